@@ -0,0 +1,340 @@
+'''
+Benchmarks of the Renko conversion.
+
+Random walk ticks of each size are converted to Renko with every renko type
+and GridPrice mode, on the compiled and the numpy paths of
+RenkoFixBrickSize_Fast and on the legacy renko.RenkoFixBrickSize. The time
+of new_quotes(), also on a renko pre-sized for its bricks, get_renko() and
+performance(), and the import time of the modules, is written as JSON, to
+track regressions between releases:
+
+    python benchmarks/bench_renko.py --sizes 1e3,1e5,1e7 --output after.json
+    python benchmarks/bench_renko.py --compare before.json after.json
+'''
+import argparse
+import datetime
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import renko                                    # noqa: E402
+import renko_fast                               # noqa: E402
+from renko_fast import GridPrice                # noqa: E402
+from renko_fast import Renko                    # noqa: E402
+from renko_fast import RenkoFixBrickSize_Fast   # noqa: E402
+
+
+# Renko types and grid prices of RenkoFixBrickSize_Fast
+VARIANTS = [
+    (Renko.TypeRenko, None),
+    (Renko.TypeRenkoSymetric, None),
+] + [(Renko.TypeGrid, grid_price) for grid_price in GridPrice]
+
+# Maximum ticks to measure the legacy implementation
+LEGACY_MAX_TICKS = 1000000
+
+# Ticks given to new_quotes() on each call
+CHUNK_TICKS = 1000000
+
+# Modules measured by bench_import()
+IMPORT_MODULES = ['renko_fast', 'renko', 'renko_book', 'renko_optimize', 'renko_async', 'renko_env']
+
+# Optional modules that the import of IMPORT_MODULES should not load
+HEAVY_MODULES = ['pandas', 'matplotlib', 'pyarrow', 'numba']
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def random_walk(size, chunk_size=CHUNK_TICKS, volatility=1., seed=0):
+    '''Generate random walk ticks by chunks, to keep the memory bounded
+
+    :return: generator of (prices, dates, volumes) numpy arrays, with one
+        tick per second
+    '''
+    rnd = np.random.RandomState(seed)
+    (last_price, first_date) = (1000., np.datetime64('2020-01-01T00:00:00', 'ns'))
+
+    for start in range(0, size, chunk_size):
+        count = min(chunk_size, size - start)
+        prices = last_price + np.cumsum(rnd.normal(0, volatility, count))
+        dates = first_date + (start + np.arange(count)) * np.timedelta64(1, 's')
+        volumes = rnd.randint(1, 1000, count).astype(np.float64)
+        last_price = prices[-1]
+
+        yield (prices, dates, volumes)
+
+
+def _timed(function, repeat):
+    '''Best time of repeat calls of function, and its last result'''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        ret = function()
+        best = min(best, time.perf_counter() - start)
+
+    return (best, ret)
+
+
+def bench_fast(size, brick_size, renko_type, grid_price, compiled, repeat):
+    '''Measure RenkoFixBrickSize_Fast over size ticks'''
+    kwargs = {'renko_type': renko_type, 'compiled': compiled}
+    if grid_price is not None:
+        kwargs['grid_price'] = grid_price
+
+    def feed(**options):
+        subject = RenkoFixBrickSize_Fast(brick_size, **kwargs, **options)
+        for (prices, dates, volumes) in random_walk(size):
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+        return subject
+
+    if compiled:
+        # Compile the kernel out of the measures
+        warm = RenkoFixBrickSize_Fast(brick_size, **kwargs)
+        warm.new_quotes(np.arange(10.))
+
+    (seconds, subject) = _timed(feed, repeat)
+    ret = [{'op': 'new_quotes', 'seconds': seconds}]
+
+    # With room for every brick and a whole chunk of ticks, as when the
+    # amount of bricks is known, nothing is estimated nor reallocated
+    initial_size = subject.get_renko().shape[0] + min(size, CHUNK_TICKS)
+    ret.append({'op': 'new_quotes_presized',
+                'seconds': _timed(lambda: feed(initial_size=initial_size), repeat)[0]})
+    for (op, function) in (
+        ('get_renko_numpy', lambda: subject.get_renko(RenkoFixBrickSize_Fast.AS_NUMPY)),
+        ('get_renko_dataframe', lambda: subject.get_renko(RenkoFixBrickSize_Fast.AS_DATAFRAME)),
+        ('get_renko_columns', lambda: subject.get_renko(RenkoFixBrickSize_Fast.AS_COLUMNS)),
+        ('performance', subject.performance),
+    ):
+        ret.append({'op': op, 'seconds': _timed(function, repeat)[0]})
+
+    bricks = subject.get_renko().shape[0]
+    for row in ret:
+        row['bricks'] = bricks
+
+    return ret
+
+
+def bench_legacy(size, brick_size, repeat):
+    '''Measure the legacy renko.RenkoFixBrickSize over size ticks'''
+    def feed():
+        subject = renko.RenkoFixBrickSize(brick_size)
+        for (prices, dates, volumes) in random_walk(size):
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+        return subject
+
+    (seconds, subject) = _timed(feed, repeat)
+    ret = [{'op': 'new_quotes', 'seconds': seconds}]
+    ret.append({'op': 'get_renko_dataframe', 'seconds': _timed(subject._dataframe, repeat)[0]})
+    ret.append({'op': 'performance', 'seconds': _timed(subject.performance, repeat)[0]})
+
+    bricks = subject.renko.shape[0]
+    for row in ret:
+        row['bricks'] = bricks
+
+    return ret
+
+
+def bench_import(module, repeat):
+    '''Measure the import of module, on a new interpreter per repetition
+
+    :return: measure with the seconds and the HEAVY_MODULES loaded by the
+        import
+    '''
+    code = (
+        'import sys, time\n'
+        'start = time.perf_counter()\n'
+        'import %s\n'
+        'seconds = time.perf_counter() - start\n'
+        'print(seconds, *sorted({name.split(".")[0] for name in sys.modules} & set(%r)))\n'
+    ) % (module, HEAVY_MODULES)
+
+    best = float('inf')
+    for _ in range(repeat):
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True,
+                                text=True, cwd=_ROOT).stdout.split()
+        best = min(best, float(output[0]))
+
+    return {'op': 'import', 'seconds': best, 'loaded': output[1:]}
+
+
+def run_imports(repeat, log=None):
+    '''Measure the import of IMPORT_MODULES
+
+    :return: list of results, a dictionary per module
+    '''
+    results = []
+    for module in IMPORT_MODULES:
+        result = {
+            'implementation': module,
+            'renko_type': None,
+            'grid_price': None,
+            'compiled': None,
+            'ticks': 0,
+            'brick_size': 0,
+        }
+        result.update(bench_import(module, repeat))
+        results.append(result)
+        if log is not None:
+            log(result)
+
+    return results
+
+
+def run(sizes, brick_sizes, repeat, legacy_max_ticks=LEGACY_MAX_TICKS, log=None):
+    '''Run every benchmark
+
+    :return: list of results, a dictionary per measure
+    '''
+    paths = [True, False] if renko_fast._HAS_NUMBA else [False]
+
+    results = []
+    for size in sizes:
+        for brick_size in brick_sizes:
+            cases = [
+                ('RenkoFixBrickSize_Fast', renko_type, grid_price, compiled)
+                for (renko_type, grid_price) in VARIANTS
+                for compiled in paths
+            ]
+            if size <= legacy_max_ticks:
+                cases.append(('RenkoFixBrickSize', Renko.TypeRenko, None, False))
+
+            for (implementation, renko_type, grid_price, compiled) in cases:
+                case = {
+                    'implementation': implementation,
+                    'renko_type': renko_type,
+                    'grid_price': None if grid_price is None else grid_price.value,
+                    'compiled': compiled,
+                    'ticks': size,
+                    'brick_size': brick_size,
+                }
+                try:
+                    if implementation == 'RenkoFixBrickSize':
+                        measures = bench_legacy(size, brick_size, repeat)
+                    else:
+                        measures = bench_fast(size, brick_size, renko_type, grid_price, compiled, repeat)
+                except Exception as error:
+                    measures = [{'op': 'new_quotes', 'error': '%s: %s' % (type(error).__name__, error)}]
+
+                for measure in measures:
+                    result = dict(case, **measure)
+                    if 'seconds' in result and result['op'] in ('new_quotes', 'new_quotes_presized'):
+                        result['ticks_per_second'] = size / result['seconds'] if result['seconds'] else None
+                    results.append(result)
+                    if log is not None:
+                        log(result)
+
+    return results
+
+
+def metadata():
+    '''Environment of the benchmarks'''
+    versions = {'python': platform.python_version(), 'numpy': np.__version__}
+    for module in ('pandas', 'numba'):
+        try:
+            versions[module] = __import__(module).__version__
+        except ImportError:
+            versions[module] = None
+
+    return {
+        'date': datetime.datetime.now(datetime.timezone.utc).isoformat(),
+        'platform': platform.platform(),
+        'processor': platform.processor(),
+        'cpus': os.cpu_count(),
+        'versions': versions,
+    }
+
+
+def _key(result):
+    return (result['implementation'], result['renko_type'], result['grid_price'], result['compiled'],
+            result['ticks'], result['brick_size'], result['op'])
+
+
+def compare(before, after, threshold=1.1):
+    '''Measures of after slower than before by more than threshold times
+
+    :return: list of (key, seconds before, seconds after) tuples
+    '''
+    previous = {_key(result): result.get('seconds') for result in before['results']}
+
+    ret = []
+    for result in after['results']:
+        seconds = previous.get(_key(result))
+        if seconds and result.get('seconds') and result['seconds'] > seconds * threshold:
+            ret.append((_key(result), seconds, result['seconds']))
+
+    return ret
+
+
+def _log(result):
+    if 'error' in result:
+        detail = result['error']
+    else:
+        detail = '%.6fs' % result['seconds']
+    if result.get('loaded'):
+        detail += ' loads %s' % ', '.join(result['loaded'])
+    print('%-22s %-14s %-4s %-5s %10d %6g %-20s %s' % (
+        result['implementation'], result['renko_type'] or '', result['grid_price'] or '',
+        '' if result['compiled'] is None else result['compiled'], result['ticks'], result['brick_size'], result['op'], detail,
+    ), file=sys.stderr)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split('\n\n')[0].strip())
+    parser.add_argument('--sizes', default='1e3,1e4,1e5,1e6',
+                        help='comma separated amounts of ticks, up to 1e8')
+    parser.add_argument('--brick-sizes', default='1,5',
+                        help='comma separated brick sizes, the ticks volatility is 1')
+    parser.add_argument('--repeat', type=int, default=3, help='repetitions, the best one is kept')
+    parser.add_argument('--legacy-max-ticks', type=float, default=LEGACY_MAX_TICKS,
+                        help='maximum ticks to measure the legacy implementation')
+    parser.add_argument('--no-import', action='store_true', help='do not measure the import time')
+    parser.add_argument('--output', help='JSON file of the results, defaults to stdout')
+    parser.add_argument('--compare', nargs=2, metavar=('BEFORE', 'AFTER'),
+                        help='list the measures of AFTER slower than on BEFORE, and exit')
+    parser.add_argument('--threshold', type=float, default=1.1,
+                        help='slowdown ratio reported by --compare')
+    args = parser.parse_args(argv)
+
+    if args.compare:
+        with open(args.compare[0]) as f:
+            before = json.load(f)
+        with open(args.compare[1]) as f:
+            after = json.load(f)
+
+        regressions = compare(before, after, args.threshold)
+        for (key, seconds_before, seconds_after) in regressions:
+            print('%s: %.6fs -> %.6fs' % (' '.join(str(field) for field in key),
+                                          seconds_before, seconds_after))
+        return 1 if regressions else 0
+
+    report = {
+        'metadata': metadata(),
+        'results': [] if args.no_import else run_imports(args.repeat, log=_log),
+    }
+    report['results'] += run(
+        [int(float(size)) for size in args.sizes.split(',')],
+        [float(brick_size) for brick_size in args.brick_sizes.split(',')],
+        args.repeat,
+        int(args.legacy_max_ticks),
+        log=_log,
+    )
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        json.dump(report, sys.stdout, indent=2)
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
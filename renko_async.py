@@ -0,0 +1,158 @@
+import asyncio
+
+import numpy as np
+
+'''
+asyncio adapter of Renko for live tick feeds.
+
+The ticks of an async iterator are gathered in micro batches, closed by
+amount of ticks or by a time window, and each batch is given to the renko
+on an executor thread, so the event loop keeps serving the feeds while the
+bricks are computed. The completed bricks are published as an async stream.
+'''
+
+# End of the ticks and of the bricks queues
+_END = object()
+
+
+class RenkoStream():
+    '''Feed a renko from an async iterator of ticks, by micro batches'''
+
+    def __init__(self, renko, batch_size=1000, batch_window=.05, executor=None):
+        '''RenkoStream Constructor
+
+        :param renko: renko that receives the ticks, like a
+            RenkoFixBrickSize_Fast
+        :param batch_size: maximum amount of ticks of a batch
+        :type batch_size: int
+        :param batch_window: maximum seconds to wait for more ticks after
+            the first tick of a batch
+        :type batch_window: float
+        :param executor: concurrent.futures executor where the batches are
+            processed. Defaults to the default executor of the event loop.
+            Only one batch is processed at a time. With max_bricks, the
+            renko must retain the bricks completed by a batch.
+        '''
+        self.renko = renko
+        self.batch_size = batch_size
+        self.batch_window = batch_window
+        self.executor = executor
+
+        self._seq = renko.sequence()
+        self._bricks = None
+
+    async def run(self, ticks):
+        '''Give all the ticks of the feed to the renko
+
+        :param ticks: async iterator of ticks. A tick is a price, or a
+            (price, date) or (price, date, volume) tuple. All the ticks of a
+            feed must have the same fields.
+        :return: the renko, once the feed is exhausted
+        '''
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=2 * self.batch_size)
+        bricks = self._bricks_queue()
+        reader = asyncio.ensure_future(self._read(ticks, queue))
+
+        try:
+            while True:
+                batch = await self._next_batch(queue, loop)
+                if batch:
+                    (seq, completed) = await loop.run_in_executor(self.executor, self._process, batch)
+                    if completed.shape[0] > 0:
+                        bricks.put_nowait((seq, completed))
+                if batch is None or (batch and batch[-1] is _END):
+                    break
+
+            # Propagate the errors of the feed
+            await reader
+        finally:
+            reader.cancel()
+            bricks.put_nowait(_END)
+
+        return self.renko
+
+    async def bricks(self):
+        '''Async generator of the completed bricks, as (seq, brick) tuples
+        with the sequence number and the brick row on the get_renko()
+        layout. It ends when run() ends.'''
+        bricks = self._bricks_queue()
+        while True:
+            completed = await bricks.get()
+            if completed is _END:
+                return
+
+            (seq, rows) = completed
+            for (row, brick) in enumerate(rows):
+                yield (seq + row, brick)
+
+    def _bricks_queue(self):
+        '''Queue of the batches of completed bricks'''
+        if self._bricks is None:
+            self._bricks = asyncio.Queue()
+        return self._bricks
+
+    async def _read(self, ticks, queue):
+        '''Move the ticks of the feed to the queue'''
+        try:
+            async for tick in ticks:
+                await queue.put(tick)
+        except Exception:
+            # Close the last batch, run() raises the error
+            await queue.put(_END)
+            raise
+
+        await queue.put(_END)
+
+    async def _next_batch(self, queue, loop):
+        '''Wait for the next batch of ticks
+
+        :return: list of ticks, ended by _END when the feed is exhausted,
+            or None if the feed ended without new ticks
+        '''
+        tick = await queue.get()
+        if tick is _END:
+            return None
+
+        batch = [tick]
+        deadline = loop.time() + self.batch_window
+        while len(batch) < self.batch_size:
+            if queue.empty():
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    tick = await asyncio.wait_for(queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+            else:
+                tick = queue.get_nowait()
+
+            batch.append(tick)
+            if tick is _END:
+                break
+
+        return batch
+
+    def _process(self, batch):
+        '''Give a batch of ticks to the renko, on the executor
+
+        :return: tuple with the sequence number of the first completed
+            brick, and a copy of the completed bricks
+        '''
+        if batch[-1] is _END:
+            batch = batch[:-1]
+
+        if np.ndim(batch[0]) == 0:
+            (prices, dates, volumes) = (batch, None, None)
+        else:
+            fields = list(zip(*batch))
+            prices = fields[0]
+            dates = fields[1] if len(fields) > 1 else None
+            volumes = fields[2] if len(fields) > 2 else None
+
+        seq = self._seq
+        completed = self.renko.new_quotes(prices, dates=dates, volumes=volumes)
+        self._seq += completed
+
+        return (seq, np.array(self.renko.bricks_since(seq)[:completed]))
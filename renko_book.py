@@ -0,0 +1,283 @@
+import os
+import queue
+import threading
+
+import numpy as np
+
+from renko_fast import RenkoFixBrickSize_Fast
+from renko_fast import dates_to_ns
+
+'''
+Renko bricks of many instruments.
+
+RenkoBook keeps a RenkoFixBrickSize_Fast per instrument, allocated on its
+first quote with a small initial size, and updates all of them from a single
+batch of interleaved quotes.
+
+ShardedRenkoBook splits the instruments in shards, each one updated by its
+own worker thread, so many feed threads can give quotes without a global
+lock.
+'''
+
+
+class RenkoBook():
+    '''Renko bricks of many instruments, updated from interleaved quotes'''
+
+    def __init__(self, brick_size, initial_size=16, **kwargs):
+        '''RenkoBook Constructor
+
+        :param brick_size: brick size of every instrument, or a sequence
+            with the brick size of each symbol id.
+        :type brick_size: int, float or list of float
+        :param initial_size: initial size of the numpy structure of each
+            instrument. It grows geometrically when needed, so it can be
+            small to keep the memory low with many instruments.
+        :type initial_size: int
+        :param kwargs: other arguments of RenkoFixBrickSize_Fast, like
+            renko_type or max_bricks
+        '''
+        if np.ndim(brick_size) == 0:
+            self.brick_size = float(brick_size)
+        else:
+            self.brick_size = np.asarray(brick_size, dtype=np.float64)
+        self.initial_size = initial_size
+        self.kwargs = kwargs
+
+        self._renkos = {}
+
+    def _renko(self, symbol_id):
+        '''Renko of the symbol, created on the first quote'''
+        try:
+            return self._renkos[symbol_id]
+        except KeyError:
+            if isinstance(self.brick_size, float):
+                brick_size = self.brick_size
+            else:
+                brick_size = self.brick_size[symbol_id]
+
+            renko = RenkoFixBrickSize_Fast(brick_size, name=symbol_id,
+                                           initial_size=self.initial_size, **self.kwargs)
+            self._renkos[symbol_id] = renko
+            return renko
+
+    def new_quotes(self, symbol_ids, prices, dates=None, volumes=None):
+        '''Set new quotes of many instruments
+
+        The quotes are grouped by symbol, keeping their order, and each
+        instrument is updated once with all its quotes.
+
+        :param symbol_ids: symbol id of each quote
+        :type symbol_ids: list of int or numpy.ndarray
+        :param prices: price of each quote
+        :type prices: list of float or numpy.ndarray
+        :param dates: date of each quote
+        :type dates: list of int, pandas.Timestamp or datetime.date
+        :param volumes: volume of each quote
+        :type volumes: list of int or float or numpy.ndarray
+        '''
+        symbol_ids = np.asarray(symbol_ids)
+        prices = np.asarray(prices, dtype=np.float64)
+        if symbol_ids.shape[0] == 0:
+            return
+
+        order = np.argsort(symbol_ids, kind='stable')
+        symbol_ids = symbol_ids[order]
+        prices = prices[order]
+        if dates is not None:
+            dates = np.asarray(dates)[order]
+        if volumes is not None:
+            volumes = np.asarray(volumes, dtype=np.float64)[order]
+
+        starts = np.flatnonzero(np.concatenate(([True], symbol_ids[1:] != symbol_ids[:-1])))
+        stops = np.append(starts[1:], symbol_ids.shape[0])
+
+        for (start, stop) in zip(starts, stops):
+            self._renko(symbol_ids[start].item()).new_quotes(
+                prices[start:stop],
+                None if dates is None else dates[start:stop],
+                None if volumes is None else volumes[start:stop],
+            )
+
+    def get_renko(self, symbol_id, ret_type=RenkoFixBrickSize_Fast.AS_NUMPY):
+        '''Renko representation of an instrument, as
+        RenkoFixBrickSize_Fast.get_renko()'''
+        return self._renkos[symbol_id].get_renko(ret_type)
+
+    def performance(self, symbol_id):
+        '''Performance metrics of an instrument, as
+        RenkoFixBrickSize_Fast.performance()'''
+        return self._renkos[symbol_id].performance()
+
+    def symbols(self):
+        '''Symbol ids with quotes'''
+        return list(self._renkos)
+
+    def __getitem__(self, symbol_id):
+        return self._renkos[symbol_id]
+
+    def __contains__(self, symbol_id):
+        return symbol_id in self._renkos
+
+    def __len__(self):
+        return len(self._renkos)
+
+
+class ShardedRenkoBook():
+    '''Renko bricks of many instruments, updated by a worker thread per
+    shard of instruments
+
+    Each instrument belongs to the shard symbol_id % shards, that is a
+    RenkoBook only written by its worker thread. new_quotes() only queues
+    the quotes, so it can be called from many threads at once, and the
+    readers take a shard lock that is held by the worker while it updates
+    the shard, to get consistent copies. The compiled kernel releases the
+    GIL, so the shards are updated in parallel.
+    '''
+
+    def __init__(self, brick_size, shards=None, initial_size=16, **kwargs):
+        '''ShardedRenkoBook Constructor
+
+        :param brick_size: brick size of every instrument, or a sequence
+            with the brick size of each symbol id.
+        :type brick_size: int, float or list of float
+        :param shards: amount of shards and worker threads. Defaults to
+            the amount of CPUs.
+        :type shards: int
+        :param initial_size: initial size of the numpy structure of each
+            instrument
+        :type initial_size: int
+        :param kwargs: other arguments of RenkoFixBrickSize_Fast, like
+            renko_type or max_bricks
+        '''
+        if shards is None:
+            shards = os.cpu_count() or 1
+
+        self._books = [RenkoBook(brick_size, initial_size=initial_size, **kwargs)
+                       for _ in range(shards)]
+        self._locks = [threading.Lock() for _ in range(shards)]
+        self._queues = [queue.Queue() for _ in range(shards)]
+        self._errors = []
+
+        self._threads = [
+            threading.Thread(target=self._work, args=(shard,), daemon=True,
+                             name='renko-shard-%d' % shard)
+            for shard in range(shards)
+        ]
+        for thread in self._threads:
+            thread.start()
+
+    def _work(self, shard):
+        '''Worker thread: update the shard with the queued quotes'''
+        book = self._books[shard]
+        lock = self._locks[shard]
+        quotes = self._queues[shard]
+
+        while True:
+            batch = quotes.get()
+            try:
+                if batch is None:
+                    return
+                with lock:
+                    book.new_quotes(*batch)
+            except Exception as error:
+                self._errors.append(error)
+            finally:
+                quotes.task_done()
+
+    def new_quotes(self, symbol_ids, prices, dates=None, volumes=None):
+        '''Queue new quotes of many instruments. It is safe to call it from
+        many threads, the quotes of an instrument given by a thread keep
+        their order.
+
+        The parameters are the ones of RenkoBook.new_quotes(), with integer
+        symbol ids.
+        '''
+        self._raise_errors()
+
+        symbol_ids = np.asarray(symbol_ids)
+        prices = np.asarray(prices, dtype=np.float64)
+        if dates is not None:
+            dates = dates_to_ns(dates).view('datetime64[ns]')
+        if volumes is not None:
+            volumes = np.asarray(volumes, dtype=np.float64)
+
+        shard_ids = symbol_ids % len(self._books)
+        for shard in np.unique(shard_ids):
+            mask = shard_ids == shard
+            self._queues[shard].put((
+                symbol_ids[mask],
+                prices[mask],
+                None if dates is None else dates[mask],
+                None if volumes is None else volumes[mask],
+            ))
+
+    def flush(self):
+        '''Wait until all the queued quotes are processed'''
+        for quotes in self._queues:
+            quotes.join()
+        self._raise_errors()
+
+    def close(self):
+        '''Process the queued quotes and stop the worker threads'''
+        for quotes in self._queues:
+            quotes.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._raise_errors()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def _raise_errors(self):
+        '''Raise the first error of the worker threads'''
+        if self._errors:
+            raise self._errors.pop(0)
+
+    def _shard(self, symbol_id):
+        return symbol_id % len(self._books)
+
+    def get_renko(self, symbol_id, ret_type=RenkoFixBrickSize_Fast.AS_NUMPY):
+        '''Copy of the renko representation of an instrument, consistent
+        while the quotes are processed
+
+        :param ret_type: RenkoFixBrickSize_Fast.AS_NUMPY or AS_COLUMNS
+        :type ret_type: str
+        '''
+        shard = self._shard(symbol_id)
+        with self._locks[shard]:
+            if ret_type == RenkoFixBrickSize_Fast.AS_NUMPY:
+                ret = self._books[shard].get_renko(symbol_id, ret_type).copy()
+            elif ret_type == RenkoFixBrickSize_Fast.AS_COLUMNS:
+                ret = {name: column.copy() for (name, column)
+                       in self._books[shard].get_renko(symbol_id, ret_type).items()}
+            else:
+                raise ValueError('Renko type %s is not supported' % ret_type)
+
+        return ret
+
+    def performance(self, symbol_id):
+        '''Performance metrics of an instrument, as
+        RenkoFixBrickSize_Fast.performance()'''
+        shard = self._shard(symbol_id)
+        with self._locks[shard]:
+            return self._books[shard].performance(symbol_id)
+
+    def symbols(self):
+        '''Symbol ids with processed quotes'''
+        ret = []
+        for (book, lock) in zip(self._books, self._locks):
+            with lock:
+                ret.extend(book.symbols())
+
+        return ret
+
+    def __contains__(self, symbol_id):
+        shard = self._shard(symbol_id)
+        with self._locks[shard]:
+            return symbol_id in self._books[shard]
+
+    def __len__(self):
+        return len(self.symbols())
@@ -0,0 +1,223 @@
+import numpy as np
+
+from renko_fast import RenkoFixBrickSize_Fast
+from renko_fast import dates_to_ns
+
+'''
+Vectorized reinforcement learning environment over Renko bricks.
+
+RenkoVecEnv steps many independent episodes in lockstep, each one over an
+instrument and a start offset of its quotes, with the gym vector API:
+reset() returns (observations, info) and step(actions) returns
+(observations, rewards, terminated, truncated, info).
+
+Every episode has a RenkoFixBrickSize_Fast that keeps only the last bricks,
+and all the returned arrays are allocated once, so a step costs little more
+than the brick updates.
+'''
+
+
+class RenkoVecEnv():
+    '''Vectorized trading environment, observing the last bricks of each
+    episode
+
+    The action of an episode is the position held during the next step,
+    like -1 short, 0 flat or 1 long, and its reward is the position times
+    the price change of the step, in bricks. An episode terminates when its
+    quotes end, it is truncated after episode_steps steps, and it is reset
+    automatically on the same step.
+    '''
+
+    def __init__(self, prices, brick_size, num_envs=None, window=32, columns=None,
+                 ticks_per_step=1, warmup_ticks=1, episode_steps=None, random_start=True,
+                 dates=None, volumes=None, dtype=np.float32, seed=None, **kwargs):
+        '''RenkoVecEnv Constructor
+
+        :param prices: quotes of an instrument, or a list with the quotes of
+            each instrument
+        :type prices: numpy.ndarray or list of numpy.ndarray
+        :param brick_size: brick size of every instrument, or a sequence
+            with the brick size of each instrument
+        :type brick_size: int, float or list of float
+        :param num_envs: amount of episodes stepped in lockstep. The
+            episode i runs over the instrument i % instruments. Defaults to
+            the amount of instruments.
+        :type num_envs: int
+        :param window: amount of last bricks of each observation
+        :type window: int
+        :param columns: columns of get_renko() on the observations, like
+            RenkoFixBrickSize_Fast.col_price_renko. Defaults to price_last,
+            price_renko and trend.
+        :type columns: list of int
+        :param ticks_per_step: amount of quotes given to the renko on each
+            step
+        :type ticks_per_step: int
+        :param warmup_ticks: amount of quotes given to the renko when an
+            episode is reset, before its first observation
+        :type warmup_ticks: int
+        :param episode_steps: maximum amount of steps of an episode.
+            Defaults to None, to run until the quotes end.
+        :type episode_steps: int
+        :param random_start: start the episodes on a random quote. If False,
+            they start on the first quote.
+        :type random_start: bool
+        :param dates: dates of the quotes, with the same layout as prices
+        :param volumes: volumes of the quotes, with the same layout as
+            prices
+        :param dtype: numpy dtype of the observations
+        :param seed: seed of the random start quotes
+        :type seed: int
+        :param kwargs: other arguments of RenkoFixBrickSize_Fast, like
+            renko_type
+        '''
+        if np.ndim(prices[0]) == 0:
+            (prices, dates, volumes) = ([prices], None if dates is None else [dates],
+                                        None if volumes is None else [volumes])
+
+        self._prices = [np.asarray(series, dtype=np.float64) for series in prices]
+        self._dates = None if dates is None else [
+            dates_to_ns(series).view('datetime64[ns]') for series in dates]
+        self._volumes = None if volumes is None else [
+            np.asarray(series, dtype=np.float64) for series in volumes]
+
+        instruments = len(self._prices)
+        self.num_envs = instruments if num_envs is None else num_envs
+        self.window = window
+        self.columns = [RenkoFixBrickSize_Fast.col_price_last, RenkoFixBrickSize_Fast.col_price_renko,
+                        RenkoFixBrickSize_Fast.col_trend] if columns is None else list(columns)
+        self.ticks_per_step = ticks_per_step
+        self.warmup_ticks = max(warmup_ticks, 1)
+        self.episode_steps = episode_steps
+        self.random_start = random_start
+
+        for series in self._prices:
+            if series.shape[0] < self.warmup_ticks + self.ticks_per_step:
+                raise ValueError('An instrument has less quotes than warmup_ticks + ticks_per_step')
+
+        # Instrument and brick size of each episode
+        self._series = np.arange(self.num_envs) % instruments
+        if np.ndim(brick_size) == 0:
+            self._brick_sizes = np.full(self.num_envs, float(brick_size))
+        else:
+            self._brick_sizes = np.asarray(brick_size, dtype=np.float64)[self._series]
+
+        kwargs['max_bricks'] = window
+        self.renkos = [RenkoFixBrickSize_Fast(self._brick_sizes[env], name=env, **kwargs)
+                       for env in range(self.num_envs)]
+
+        # Next quote and steps of each episode
+        self._ticks = np.zeros(self.num_envs, dtype=np.int64)
+        self._steps = np.zeros(self.num_envs, dtype=np.int64)
+        self._random = np.random.RandomState(seed)
+
+        # Buffers returned on every step
+        shape = (self.num_envs, window, len(self.columns))
+        self.observations = np.zeros(shape, dtype=dtype)
+        self.positions = np.zeros(self.num_envs)
+        self.rewards = np.zeros(self.num_envs)
+        self.terminated = np.zeros(self.num_envs, dtype=bool)
+        self.truncated = np.zeros(self.num_envs, dtype=bool)
+        self._info = {
+            'bricks': np.zeros(self.num_envs, dtype=np.int64),
+            'final_observation': np.zeros(shape, dtype=dtype),
+        }
+
+    @property
+    def observation_shape(self):
+        '''Shape of the observations, (num_envs, window, columns)'''
+        return self.observations.shape
+
+    def reset(self, seed=None):
+        '''Start new episodes on every environment
+
+        :param seed: new seed of the random start quotes
+        :type seed: int
+        :return: tuple with the observations and the info dictionary. The
+            arrays are reused by the next calls, copy them to keep them.
+        '''
+        if seed is not None:
+            self._random = np.random.RandomState(seed)
+
+        self.positions[:] = 0
+        self.rewards[:] = 0
+        self.terminated[:] = False
+        self.truncated[:] = False
+        for env in range(self.num_envs):
+            self._reset_env(env)
+            self._observe(env, self.observations)
+
+        return (self.observations, self._info)
+
+    def step(self, actions):
+        '''Give the next quotes to every episode
+
+        :param actions: position held by each episode during the step
+        :type actions: numpy.ndarray of float
+        :return: tuple with the observations, the rewards, the terminated
+            and the truncated flags of each episode, and the info
+            dictionary, with the amount of bricks completed by the step on
+            'bricks' and the last observation of the episodes that ended on
+            'final_observation'. The observations of the episodes that
+            ended are the first ones of their new episodes. The arrays are
+            reused by the next calls, copy them to keep them.
+        '''
+        self.positions[:] = actions
+        bricks = self._info['bricks']
+
+        for env in range(self.num_envs):
+            prices = self._prices[self._series[env]]
+            start = self._ticks[env]
+            stop = start + self.ticks_per_step
+
+            bricks[env] = self._feed(env, start, stop)
+            self.rewards[env] = (self.positions[env] * (prices[stop - 1] - prices[start - 1])
+                                 / self._brick_sizes[env])
+            self._ticks[env] = stop
+            self._steps[env] += 1
+
+            self.terminated[env] = stop + self.ticks_per_step > prices.shape[0]
+            self.truncated[env] = (not self.terminated[env] and self.episode_steps is not None
+                                   and self._steps[env] >= self.episode_steps)
+            if self.terminated[env] or self.truncated[env]:
+                self._observe(env, self._info['final_observation'])
+                self._reset_env(env)
+
+            self._observe(env, self.observations)
+
+        return (self.observations, self.rewards, self.terminated, self.truncated, self._info)
+
+    def close(self):
+        '''Release the renkos'''
+        self.renkos = []
+
+    def _feed(self, env, start, stop):
+        '''Give the quotes start:stop of its instrument to an episode
+
+        :return: amount of bricks completed
+        '''
+        series = self._series[env]
+        return self.renkos[env].new_quotes(
+            self._prices[series][start:stop],
+            None if self._dates is None else self._dates[series][start:stop],
+            None if self._volumes is None else self._volumes[series][start:stop],
+        )
+
+    def _reset_env(self, env):
+        '''Start a new episode, reusing the renko of the previous one'''
+        size = self._prices[self._series[env]].shape[0]
+        start = 0
+        if self.random_start:
+            start = self._random.randint(0, size - self.warmup_ticks - self.ticks_per_step + 1)
+
+        self.renkos[env].reset()
+        self._feed(env, start, start + self.warmup_ticks)
+        self._ticks[env] = start + self.warmup_ticks
+        self._steps[env] = 0
+
+    def _observe(self, env, observations):
+        '''Write the last window bricks of an episode on observations,
+        aligned to the end and with zeros before the first brick'''
+        renko = self.renkos[env].get_renko()
+        count = min(renko.shape[0], self.window)
+        observations[env, :self.window - count] = 0
+        observations[env, self.window - count:] = renko[renko.shape[0] - count:, self.columns]
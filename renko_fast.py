@@ -1,11 +1,15 @@
-import datetime
-import calendar
+import importlib.util
+import json
+import os
+import sys
+import tempfile
 from enum import Enum
 
-import pandas as pd
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib.patches as patches
+
+# The compiled kernel is optional. numba is imported on the first compiled
+# new_quotes(), as its import is slow
+_HAS_NUMBA = importlib.util.find_spec('numba') is not None
 
 '''
 Renko library optimized for Reinforcement Learning.
@@ -83,6 +87,64 @@ class RenkoFixBrickSize_Fast(Renko):
 
     AS_NUMPY = 'numpy'
     AS_DATAFRAME = 'dataframe'
+    AS_COLUMNS = 'columns'
+    AS_ARROW = 'arrow'
+    AS_ARROW_DATAFRAME = 'arrow_dataframe'
+
+    # Events of add_listener(): a new brick, a new brick with the opposite
+    # trend of the previous one, and a new brick that makes length
+    # consecutive bricks with the same trend
+    EVENT_BRICK = 'brick'
+    EVENT_REVERSAL = 'reversal'
+    EVENT_RUN = 'run'
+
+    # STORAGE_MATRIX: the bricks are stored on a float numpy matrix, with a
+    # column per field. get_renko() returns views of it.
+    STORAGE_MATRIX = 'matrix'
+
+    # STORAGE_COLUMNS: the bricks are stored on a typed array per field (int8
+    # trend, int32 counters, int64 nanoseconds timestamps). Only the latest
+    # bricks are kept on a small float matrix while they are updated, and
+    # get_renko(AS_NUMPY) converts the columns back to the matrix layout.
+    STORAGE_COLUMNS = 'columns'
+
+    # Minimum quotes on new_quotes to preallocate the estimated bricks
+    _reserve_min_quotes = 1000
+
+    # The file of storage_path grows by multiples of these rows
+    _store_chunk_rows = 16384
+
+    # Rows of the float matrix on STORAGE_COLUMNS
+    _hot_rows = 256
+
+    # Rows converted at once from the float matrix to typed columns
+    _convert_block_rows = 16384
+
+    # Sentinel of a missing timestamp on the typed columns (NaT)
+    _NAT = np.iinfo(np.int64).min
+
+    # With ns_dates, the float matrix has two hidden columns after the
+    # public ones, with the dates as int64 nanoseconds. They are written
+    # through an int64 view of the matrix, so the dates are moved together
+    # with the bricks.
+    _public_cols = 11
+    _col_ns_start = 11
+    _col_ns_end = 12
+    _matrix_cols = 13
+
+    # Bounds of the window used to search the next brick boundary on
+    # new_quotes. The window grows up to the max while no boundary is found.
+    # When the bricks are short, the quotes are stepped one by one, by blocks
+    # growing up to _dense_block quotes, until a brick is longer than
+    # _scan_probe quotes.
+    _scan_chunk_min = 32
+    _scan_chunk_max = 65536
+    _scan_probe = 32
+    _dense_block = 1024
+
+    # Gaps of at least these bricks are added at once, instead of brick by
+    # brick
+    _gap_min_bricks = 8
 
     def __init__(self, brick_size, name=None, initial_size=10000, increment_pct=.5,
                  renko_type=Renko.TypeRenko, **kwargs):
@@ -100,6 +162,33 @@ class RenkoFixBrickSize_Fast(Renko):
             numpy data structure that stores Renko's bricks, when it needs
             to be resized.
         :type increment_pct: float
+        :param compiled: process the quotes with the numba compiled kernel,
+            when numba is installed. Defaults to True. The results are the
+            same on both paths.
+        :type compiled: bool
+        :param storage: how the bricks are stored, STORAGE_MATRIX (default)
+            or STORAGE_COLUMNS.
+        :type storage: str
+        :param price_dtype: numpy dtype of the prices on STORAGE_COLUMNS.
+            Defaults to float64.
+        :type price_dtype: numpy.dtype
+        :param max_bricks: keep only the last max_bricks bricks, on a
+            fixed size memory. get_renko() and performance() work over
+            them. Defaults to None, to keep all the bricks.
+        :type max_bricks: int
+        :param storage_path: keep the bricks on a memory mapped file at this
+            path, instead of memory, for series bigger than the RAM. The
+            file grows in chunks as needed, get_renko() returns slices of
+            the mapping, and flush() saves the state so the file can be
+            restored with load(). It is created from scratch.
+        :type storage_path: str
+        :param ns_dates: keep the exact dates in int64 nanoseconds on
+            STORAGE_MATRIX, for get_renko(AS_COLUMNS) and AS_ARROW. It
+            costs 16 more bytes per brick, 104 instead of 88. Defaults to
+            False, to convert the float seconds of the bricks back to
+            nanoseconds, exact up to about a microsecond. STORAGE_COLUMNS
+            always keeps them.
+        :type ns_dates: bool
         '''
         Renko.__init__(self, name, renko_type=renko_type)
 
@@ -107,8 +196,54 @@ class RenkoFixBrickSize_Fast(Renko):
         self.initial_size = initial_size
         self.increment_pct = increment_pct
 
-        self._renko = np.zeros([self.initial_size, 11])
+        self.max_bricks = kwargs.get('max_bricks')
+        self.storage_path = kwargs.get('storage_path')
+        self._storage = kwargs.get('storage', self.STORAGE_MATRIX)
+        self.ns_dates = kwargs.get('ns_dates', False) or self._storage == self.STORAGE_COLUMNS
+        self._renko_cols = self._matrix_cols if self.ns_dates else self._public_cols
+        if self.storage_path is not None and (self.max_bricks is not None
+                                              or self._storage != self.STORAGE_MATRIX):
+            raise ValueError('storage_path is only supported on STORAGE_MATRIX without max_bricks')
+        if self.max_bricks is not None:
+            if self.max_bricks < 1:
+                raise ValueError('max_bricks must be positive')
+            if self._storage != self.STORAGE_MATRIX:
+                raise ValueError('max_bricks is only supported on STORAGE_MATRIX')
+
+            # Twice the window, so the retained bricks are moved back once
+            # every max_bricks new bricks
+            self._set_matrix(np.zeros([2 * self.max_bricks, self._renko_cols]))
+            self._columns = None
+        elif self._storage == self.STORAGE_MATRIX:
+            self._renko = None
+            if self.storage_path is None:
+                self._set_matrix(np.zeros([self.initial_size, self._renko_cols]))
+            self._columns = None
+        elif self._storage == self.STORAGE_COLUMNS:
+            self._set_matrix(np.zeros([min(self.initial_size, self._hot_rows), self._renko_cols]))
+            self._columns = self._new_columns(
+                self.initial_size, kwargs.get('price_dtype', np.float64))
+        else:
+            raise ValueError('Storage %s is not supported' % self._storage)
+
+        # Index of the last brick on self._renko, and amount of bricks
+        # stored before its first row
         self._index = -1
+        self._offset = 0
+
+        # Running performance() metrics: bricks added and dropped from them,
+        # count of quotes of the closed bricks, and consecutive bricks with
+        # the same and with different trend
+        self._stats_bricks = 0
+        self._stats_dropped = 0
+        self._count_sum = np.float64(0)
+        self._equal_trend = 0
+        self._changed_trend = 0
+
+        # Listeners of add_listener(), as (event, callback, length) tuples,
+        # and position of the first brick without events fired
+        self._listeners = []
+        self._events_brick = 0
 
         # Set self._grid_price
         if renko_type == Renko.TypeGrid:
@@ -118,8 +253,19 @@ class RenkoFixBrickSize_Fast(Renko):
         else:
             self._grid_price = None
 
+        # Use the compiled kernel on new_quotes, when numba is installed
+        self.compiled = kwargs.get('compiled', True) and _HAS_NUMBA
+
+        if self.storage_path is not None:
+            with open(self.storage_path, 'wb'):
+                pass
+            self._open_store(self.initial_size)
+
     def _initial_brick(self, price, date, volume):
-        '''Stores the first renko brick'''
+        '''Stores the first renko brick
+
+        The date is in int64 nanoseconds.
+        '''
         if self._type in (Renko.TypeRenko, Renko.TypeRenkoSymetric):
             (brick_lower_limit, brick_upper_limit) = (price - self.brick_size, price + self.brick_size)
             renko_price = price
@@ -156,20 +302,27 @@ class RenkoFixBrickSize_Fast(Renko):
 
         # Add optional info
         if date is not None:
-            new_brick[self.col_dt_start] = date
-            new_brick[self.col_dt_end] = date
+            new_brick[self.col_dt_start] = _ns_to_seconds(date)
+            new_brick[self.col_dt_end] = new_brick[self.col_dt_start]
         if volume is not None:
             new_brick[self.col_volume] = volume
 
         self._index = 0
-        self._renko[self._index] = new_brick
+        self._set_brick(new_brick, date)
 
         return
 
     def _new_brick(self, price, date, volume):
-        '''Add a new Renko Brick'''
+        '''Add a new Renko Brick. The date is in int64 nanoseconds.
+
+        After its first bricks, the rest of a long gap is added at once by
+        _gap_bricks().
+        '''
+        seconds = None if date is None else _ns_to_seconds(date)
         while True:
-            last_brick = self._renko[self._index]
+            # Python floats are faster than numpy scalars, with the same results
+            row = self._renko[self._index]
+            last_brick = row.tolist()
 
             if (price >= last_brick[self.col_price_max] and (self._type != Renko.TypeGrid or price > last_brick[self.col_price_max])):
                 cons_down = 0
@@ -279,9 +432,9 @@ class RenkoFixBrickSize_Fast(Renko):
 
                 new_trend = -1
             else:
-                last_brick[self.col_count] = 1
+                row[self.col_count] = 1
                 if volume is not None:
-                    last_brick[self.col_volume] = volume
+                    row[self.col_volume] = volume
 
                 break
 
@@ -301,70 +454,931 @@ class RenkoFixBrickSize_Fast(Renko):
 
             # Add optional info
             if date is not None:
-                new_brick[self.col_dt_start] = date
-                new_brick[self.col_dt_end] = date
-
-            try:
-                self._index += 1
-                self._renko[self._index] = new_brick
-            except IndexError as e:
-                # Extend the renko numpy array
-                old_rows, old_columns = self._renko.shape
-                new_rows  = int(old_rows * ( self.increment_pct))
-                if new_rows < 1:
-                    new_rows = 100
-
-                new_empty_renko = np.empty((new_rows, old_columns),
-                                           dtype=self._renko.dtype)
-                self._renko = np.concatenate((self._renko, new_empty_renko))
-
-                # Store the new brick
-                self._renko[self._index] = new_brick
+                new_brick[self.col_dt_start] = seconds
+                new_brick[self.col_dt_end] = seconds
 
-                pass
+            if self._index + 1 >= self._renko.shape[0]:
+                self._make_room(1)
+
+            self._index += 1
+            self._set_brick(new_brick, date)
+
+            if abs(price - new_price_renko) >= self._gap_min_bricks * self.brick_size:
+                # The rest of a long gap follows the trend of the new brick
+                self._gap_bricks(price, date, seconds)
+
+    def _gap_bricks(self, price, date, seconds):
+        '''Add at once the bricks of a gap that follow the last brick on its
+        trend, up to the one that contains the price
+
+        They are an arithmetic progression, accumulated in order so they
+        match the brick by brick sums of _new_brick(). The last one is
+        left open for _new_brick() to count the quote.
+        '''
+        last_brick = self._renko[self._index, :self._public_cols].tolist()
+        direction = last_brick[self.col_trend]
+        brick_size = self.brick_size
+
+        # The last brick, followed by an upper bound of the gap bricks
+        bricks = int(abs(price - last_brick[self.col_price_renko]) / brick_size) + 2
+        steps = np.full(bricks + 1, direction * brick_size)
+        if self._type == Renko.TypeGrid:
+            steps[0] = last_brick[self.col_price_min]
+            price_min = np.add.accumulate(steps)
+            steps[0] = last_brick[self.col_price_max]
+            price_max = np.add.accumulate(steps)
+
+            if self._grid_price == GridPrice.AVG:
+                price_renko = (price_min + price_max) / 2
+            elif self._grid_price == GridPrice.MIN:
+                price_renko = price_min
+            elif self._grid_price == GridPrice.MAX:
+                price_renko = price_max
+            else:
+                raise Exception('GridPrice %s is not supported' % self._grid_price)
+
+            up = price > price_max
+            down = price < price_min
+        else:
+            steps[0] = last_brick[self.col_price_renko]
+            price_renko = np.add.accumulate(steps)
+
+            reversal_size = (2 if self._type == Renko.TypeRenko else 1) * brick_size
+            if direction > 0:
+                price_min = price_renko - reversal_size
+                price_max = price_renko + brick_size
+            else:
+                price_min = price_renko - brick_size
+                price_max = price_renko + reversal_size
+            price_min[0] = last_brick[self.col_price_min]
+            price_max[0] = last_brick[self.col_price_max]
+
+            up = price >= price_max
+            down = price <= price_min
+
+        # Each brick adds the next one while the price goes on beyond it
+        beyond = up if direction > 0 else ~up & down
+        stops = np.flatnonzero(~beyond[:bricks])
+        bricks = int(stops[0]) if stops.shape[0] > 0 else bricks
+        if bricks == 0:
+            return
+
+        skipped = 0
+        if self.max_bricks is not None and not self._listeners and bricks >= self.max_bricks:
+            # Only the last bricks of the gap are retained, with its trend
+            # and no quotes, so the rest are not written and the running
+            # metrics are set over the retained ones
+            skipped = bricks - self.max_bricks
+            self._offset += self._index + 1 + skipped
+            self._index = -1
+            self._count_sum = np.float64(0)
+            self._equal_trend = self.max_bricks - 1
+            self._changed_trend = 0
+            self._stats_bricks = self._offset + self.max_bricks
+            self._stats_dropped = self._offset
+
+        new_bricks = np.zeros((bricks - skipped, self._public_cols))
+        new_bricks[:, self.col_price_last] = price
+        new_bricks[:, self.col_price_renko] = price_renko[skipped + 1:bricks + 1]
+        new_bricks[:, self.col_price_min] = price_min[skipped + 1:bricks + 1]
+        new_bricks[:, self.col_price_max] = price_max[skipped + 1:bricks + 1]
+        new_bricks[:, self.col_dt_start] = np.nan if date is None else seconds
+        new_bricks[:, self.col_dt_end] = new_bricks[:, self.col_dt_start]
+        new_bricks[:, self.col_trend] = direction
+        col_cons = self.col_cons_up if direction > 0 else self.col_cons_down
+        new_bricks[:, col_cons] = last_brick[col_cons] + np.arange(skipped + 1, bricks + 1)
+
+        # Written in blocks of the free rows
+        position = 0
+        while position < new_bricks.shape[0]:
+            if self._index + 1 >= self._renko.shape[0]:
+                self._make_room(1)
+            start = self._index + 1
+            stop = min(start + new_bricks.shape[0] - position, self._renko.shape[0])
+            self._renko[start:stop, :self._public_cols] = new_bricks[position:position + stop - start]
+            if self.ns_dates:
+                self._renko_ns[start:stop, self._col_ns_start:self._col_ns_end + 1] = (
+                    self._NAT if date is None else date)
+            position += stop - start
+            self._index = stop - 1
+
+    def _next_brick(self, brick, price):
+        '''Next brick of a quote out of the last brick, computed as on
+        _new_brick() without its generic loop
+
+        :param brick: fields of the last brick, as Python floats, that are
+            faster than numpy scalars with the same results
+        :type brick: list
+        :return: tuple with the fields of the new brick and True if the
+            quote is inside it, so it adds no more bricks. None if the quote
+            is on the boundary of a grid brick, and adds no brick.
+        '''
+        price_min = brick[self.col_price_min]
+        price_max = brick[self.col_price_max]
+        trend = brick[self.col_trend]
+        brick_size = self.brick_size
+
+        if self._type == Renko.TypeGrid:
+            if price > price_max:
+                (direction, reversal) = (1, trend < 0)
+                brick_lower_limit = price_min + brick_size
+                brick_upper_limit = price_max + brick_size
+            elif price < price_min:
+                (direction, reversal) = (-1, trend > 0)
+                brick_lower_limit = price_min - brick_size
+                brick_upper_limit = price_max - brick_size
+            else:
+                return None
+
+            inside = brick_lower_limit <= price <= brick_upper_limit
+            if self._grid_price == GridPrice.AVG:
+                new_price_renko = (brick_lower_limit + brick_upper_limit) / 2
+            elif self._grid_price == GridPrice.MIN:
+                new_price_renko = brick_lower_limit
+            elif self._grid_price == GridPrice.MAX:
+                new_price_renko = brick_upper_limit
+            else:
+                raise Exception('GridPrice %s is not supported' % self._grid_price)
+        else:
+            reversal_size = (2 if self._type == Renko.TypeRenko else 1) * brick_size
+            if price >= price_max:
+                (direction, reversal) = (1, trend < 0)
+                new_price_renko = brick[self.col_price_renko] + (reversal_size if reversal else brick_size)
+                brick_lower_limit = new_price_renko - reversal_size
+                brick_upper_limit = new_price_renko + brick_size
+            else:
+                (direction, reversal) = (-1, trend > 0)
+                new_price_renko = brick[self.col_price_renko] - (reversal_size if reversal else brick_size)
+                brick_lower_limit = new_price_renko - brick_size
+                brick_upper_limit = new_price_renko + reversal_size
+
+            inside = brick_lower_limit < price < brick_upper_limit
+
+        if direction > 0:
+            cons_up = 1 if reversal else brick[self.col_cons_up] + 1
+            cons_down = 0
+        else:
+            cons_up = 0
+            cons_down = 1 if reversal else brick[self.col_cons_down] + 1
+
+        new_brick = [price, new_price_renko, brick_lower_limit, brick_upper_limit, np.nan, np.nan,
+                     direction, 0, 0, cons_up, cons_down]
+
+        return (new_brick, inside)
+
+    def _set_brick(self, brick, date):
+        '''Write the brick fields and its date in nanoseconds on the row
+        self._index'''
+        self._renko[self._index, :self._public_cols] = brick
+        if not self.ns_dates:
+            return
+        if date is None:
+            date = self._NAT
+        self._renko_ns[self._index, self._col_ns_start] = date
+        self._renko_ns[self._index, self._col_ns_end] = date
+
+    def _set_matrix(self, renko):
+        '''Set the float matrix of the bricks, and its int64 view'''
+        self._renko = renko
+        self._renko_ns = renko.view(np.int64) if self.ns_dates else None
+
+    def _last_brick_ns(self):
+        '''Dates in nanoseconds of the last brick, as a list'''
+        if not self.ns_dates:
+            return [self._NAT, self._NAT]
+
+        return self._renko_ns[self._index, self._col_ns_start:self._col_ns_end + 1].tolist()
+
+    def _window_start(self):
+        '''Row of self._renko with the first retained brick'''
+        if self.max_bricks is None:
+            return 0
+
+        return max(self._index + 1 - self.max_bricks, 0)
+
+    def _first_brick(self):
+        '''Position in the whole series of the first brick returned by
+        get_renko()'''
+        if self._storage == self.STORAGE_COLUMNS:
+            return 0
+
+        return self._offset + self._window_start()
+
+    def _make_room(self, min_rows):
+        '''Make room for at least min_rows new bricks after the last one'''
+        self._update_stats()
+        self._fire_events()
+
+        if self.max_bricks is not None:
+            # After sliding, at least max_bricks rows are free, and the
+            # memory is never grown
+            self._slide()
+            if min_rows > self._renko.shape[0] - self._index - 1:
+                raise Exception('Internal error. No room for %d bricks' % min_rows)
+            return
+        elif self._storage == self.STORAGE_COLUMNS:
+            self._spill()
+            if self._renko.shape[0] - 1 >= min_rows:
+                return
+
+        self._grow(min_rows)
+
+    def _grow(self, min_rows):
+        '''Extend the renko numpy array, at least min_rows rows
+
+        The array grows geometrically by increment_pct, so appending bricks
+        is amortized O(1).
+        '''
+        old_rows = self._renko.shape[0]
+        new_rows = int(old_rows * self.increment_pct)
+        if new_rows < 1:
+            new_rows = 100
+        new_rows = max(new_rows, self._index + 1 + min_rows - old_rows)
+
+        self._resize(old_rows + new_rows)
+
+    def _resize(self, rows):
+        '''Reallocate the renko numpy array with rows rows, keeping the
+        stored bricks'''
+        if self.storage_path is not None:
+            # The file only grows, as the views of get_renko() map it
+            rows = -(-rows // self._store_chunk_rows) * self._store_chunk_rows
+            if rows > self._renko.shape[0]:
+                self._renko.flush()
+                self._open_store(rows)
+            return
+
+        renko = np.zeros((rows, self._renko.shape[1]), dtype=self._renko.dtype)
+        renko[:self._index + 1] = self._renko[:self._index + 1]
+        self._set_matrix(renko)
+
+    def reserve(self, bricks):
+        '''Preallocate room for at least the given total amount of bricks,
+        so no reallocation happens until that size is reached
+
+        :param bricks: total amount of bricks, including the stored ones
+        :type bricks: int
+        '''
+        if self.max_bricks is not None:
+            # The memory is already bounded
+            return
+
+        if self._storage == self.STORAGE_COLUMNS:
+            if bricks > self._columns['trend'].shape[0]:
+                self._resize_columns(bricks)
+        elif bricks > self._renko.shape[0]:
+            self._resize(bricks)
+
+    def _reserve_estimate(self, prices):
+        '''Make room for the estimated amount of bricks of a batch of quotes
+
+        Unlike reserve(), the storage grows geometrically, at least by
+        increment_pct, so consecutive batches reallocate O(log n) times.
+        The bricks are only estimated when there are less free rows than
+        quotes, so a renko with enough room does not pay for it.
+        '''
+        if self.max_bricks is not None:
+            return
+
+        bricks = self._offset + self._index + 1
+        if self._storage == self.STORAGE_COLUMNS:
+            capacity = self._columns['trend'].shape[0]
+        else:
+            capacity = self._renko.shape[0]
+        if capacity - bricks >= prices.shape[0]:
+            return
+
+        bricks += self.estimate_bricks(prices)
+        if self._storage == self.STORAGE_COLUMNS:
+            if bricks > capacity:
+                self._resize_columns(max(bricks, int(capacity * (1 + self.increment_pct))))
+        elif bricks > capacity:
+            self._grow(bricks - self._index - 1)
+
+    def shrink_to_fit(self):
+        '''Release the memory preallocated for bricks not stored yet'''
+        if self.max_bricks is not None:
+            return
+
+        if self._storage == self.STORAGE_COLUMNS:
+            self._resize_columns(self._offset + self._index + 1)
+        else:
+            self._resize(max(self._index + 1, 1))
+
+    def reset(self):
+        '''Discard all the bricks to start a new series, keeping the
+        allocated memory, the settings and the listeners. The sequence
+        numbers start again from zero.'''
+        self._index = -1
+        self._offset = 0
+
+        self._stats_bricks = 0
+        self._stats_dropped = 0
+        self._count_sum = np.float64(0)
+        self._equal_trend = 0
+        self._changed_trend = 0
 
-    def new_quotes(self, prices, dates=None, volumes=None):
+        self._events_brick = 0
+
+    def estimate_bricks(self, prices):
+        '''Estimate how many bricks would add the given quotes
+
+        Grid bricks are formed each time the price travels a brick size, so
+        they are estimated with the path length of the prices. Renko bricks
+        need to travel back the reversal size: for a random walk they follow
+        the quadratic variation of the prices, up to the path length.
+
+        :param prices: prices of the quotes
+        :type prices: numpy.ndarray
+        :return: estimated amount of bricks
+        :rtype: int
+        '''
+        prices = np.asarray(prices, dtype=np.float64)
+        if prices.shape[0] < 2:
+            return prices.shape[0]
+
+        diff = np.diff(prices)
+        quadratic_variation = np.dot(diff, diff)
+        path_length = np.abs(diff, out=diff).sum()
+
+        if self._type == Renko.TypeGrid:
+            estimate = path_length / self.brick_size
+        else:
+            reversal_size = (2 if self._type == Renko.TypeRenko else 1) * self.brick_size
+            price_range = np.max(prices) - np.min(prices)
+            estimate = min(
+                max(quadratic_variation / reversal_size, price_range) / self.brick_size,
+                path_length / self.brick_size,
+            )
+
+        if not np.isfinite(estimate):
+            return 0
+
+        return int(estimate * 1.1) + 16
+
+    def _new_columns(self, size, price_dtype):
+        '''Allocate the typed arrays of STORAGE_COLUMNS'''
+        dtypes = {
+            'price_last': price_dtype,
+            'price_renko': price_dtype,
+            'price_min': price_dtype,
+            'price_max': price_dtype,
+            'dt_start': np.int64,
+            'dt_end': np.int64,
+            'trend': np.int8,
+            'volume': np.float64,
+            'count': np.int32,
+            'cons_up': np.int32,
+            'cons_down': np.int32,
+        }
+
+        return {name: np.zeros(size, dtype=dtypes[name])
+                for name in self.as_dataframe_colnames}
+
+    def _store_columns(self, start, stop):
+        '''Copy the rows start:stop of the float matrix to the typed
+        columns, after the bricks already stored there'''
+        first = self._offset + start
+        last = self._offset + stop
+
+        capacity = self._columns['trend'].shape[0]
+        if last > capacity:
+            self._resize_columns(max(last, int(capacity * (1 + self.increment_pct)), 100))
+
+        self._matrix_to_columns(self._renko[start:stop], self._columns, first)
+
+    def _matrix_to_columns(self, renko, columns, first):
+        '''Copy bricks in the float matrix layout to typed columns, from
+        the row first'''
+        if renko.shape[1] < self._matrix_cols:
+            # Without the nanoseconds columns, from the float seconds
+            renko_ns = np.empty((renko.shape[0], self._matrix_cols), dtype=np.int64)
+            renko_ns[:, self._col_ns_start] = dates_to_ns(renko[:, self.col_dt_start])
+            renko_ns[:, self._col_ns_end] = dates_to_ns(renko[:, self.col_dt_end])
+        else:
+            renko_ns = renko.view(np.int64)
+        sources = []
+        for (col, name) in enumerate(self.as_dataframe_colnames):
+            if name == 'dt_start':
+                sources.append((columns[name], renko_ns, self._col_ns_start))
+            elif name == 'dt_end':
+                sources.append((columns[name], renko_ns, self._col_ns_end))
+            else:
+                sources.append((columns[name], renko, col))
+
+        # By blocks of rows that fit on the CPU cache, instead of walking
+        # the whole matrix once per column
+        for start in range(0, renko.shape[0], self._convert_block_rows):
+            stop = min(start + self._convert_block_rows, renko.shape[0])
+            for (column, matrix, col) in sources:
+                column[first + start:first + stop] = matrix[start:stop, col]
+
+    def _resize_columns(self, size):
+        '''Reallocate the typed columns with size rows, keeping the
+        spilled bricks'''
+        for (name, column) in self._columns.items():
+            new_column = np.zeros(size, dtype=column.dtype)
+            new_column[:self._offset] = column[:self._offset]
+            self._columns[name] = new_column
+
+    def _slide(self):
+        '''Discard the bricks out of the max_bricks window, moving the
+        retained ones to the beginning of the renko numpy array'''
+        start = self._window_start()
+        self._renko[:self._index + 1 - start] = self._renko[start:self._index + 1]
+        self._offset += start
+        self._index -= start
+
+    def _spill(self):
+        '''Move the finished bricks from the float matrix to the typed
+        columns, keeping only the last brick on the matrix'''
+        self._store_columns(0, self._index)
+        self._renko[0] = self._renko[self._index]
+        self._offset += self._index
+        self._index = 0
+
+    def new_quotes(self, prices, dates=None, volumes=None, brick_index=None):
         '''Set a new underlying quote
 
         :param prices: list of the prices  to convert to Renko
-        :type prices: list of float
-        :param dates: date of the quotes
-        :type dates: list of int, pandasd.Timestamp or datetime.date
+        :type prices: list of float or numpy.ndarray
+        :param dates: date of the quotes, converted with dates_to_ns()
+        :type dates: numpy.ndarray of datetime64 or epoch seconds,
+            pandas.DatetimeIndex, or list of pandas.Timestamp or
+            datetime.date
         :param volumes: Volume of the underlying quote
-        :type volumes: list of int or float
+        :type volumes: list of int or float or numpy.ndarray
+        :param brick_index: array with the size of prices, filled with the
+            position of the brick of each quote on the whole series, as
+            the quotes are processed. On get_renko(), it is the row
+            position - (sequence() + 1 - len(get_renko())). The quotes of a
+            brick are counted on its count column, except on TypeGrid,
+            where a quote on a brick boundary restarts the count and the
+            volume of its brick. Use aggregate_bricks() to aggregate the
+            quotes by brick.
+        :type brick_index: numpy.ndarray of int32 or int64
+        :return: amount of bricks completed by the quotes, that is, how
+            much sequence() advanced
+        :rtype: int
+        '''
+        prices = np.asarray(prices, dtype=np.float64)
+        if dates is not None:
+            dates = dates_to_ns(dates)
+        if volumes is not None:
+            volumes = np.asarray(volumes, dtype=np.float64)
+        if brick_index is not None and (brick_index.shape != prices.shape
+                                        or brick_index.dtype.kind != 'i'):
+            raise ValueError('brick_index must be an integer array with the size of prices')
+
+        if prices.shape[0] == 0:
+            return 0
+
+        sequence = self.sequence()
+
+        if self._index == -1:
+            self._initial_brick(
+                float(prices[0]),
+                None if dates is None else int(dates[0]),
+                None if volumes is None else float(volumes[0]),
+            )
+            prices = prices[1:]
+            dates = None if dates is None else dates[1:]
+            volumes = None if volumes is None else volumes[1:]
+            if brick_index is not None:
+                brick_index[0] = self._offset
+                brick_index = brick_index[1:]
+
+        # Avoid reallocating on big batches
+        if prices.shape[0] >= self._reserve_min_quotes:
+            self._reserve_estimate(prices)
+
+        if self.compiled:
+            self._new_quotes_compiled(prices, dates, volumes, brick_index)
+        else:
+            self._new_quotes_batch(prices, dates, volumes, brick_index=brick_index)
+
+        self._fire_events()
+
+        return self.sequence() - sequence
+
+    def add_listener(self, event, callback, length=None):
+        '''Call a function on each brick added with an event
+
+        The listeners are called after the quotes that added the bricks
+        are processed, in the order of the bricks, so they add no cost to
+        the processing of the quotes. Nothing is done when there are no
+        listeners.
+
+        :param event: self.EVENT_BRICK, self.EVENT_REVERSAL or
+            self.EVENT_RUN
+        :type event: str
+        :param callback: function called with the renko, the sequence
+            number of the brick and the brick row, on the get_renko()
+            layout. The row is a view, and the last brick can still change.
+        :type callback: callable
+        :param length: consecutive bricks with the same trend of
+            EVENT_RUN, as on the cons_up and cons_down columns
+        :type length: int
         '''
+        if event not in (self.EVENT_BRICK, self.EVENT_REVERSAL, self.EVENT_RUN):
+            raise ValueError('Event %s is not supported' % event)
+        if (event == self.EVENT_RUN) != (length is not None):
+            raise ValueError('length is needed by EVENT_RUN only')
+
+        if not self._listeners:
+            # Only the bricks from now on
+            self._events_brick = self._offset + self._index + 1
+        self._listeners.append((event, callback, length))
+
+    def remove_listener(self, event, callback, length=None):
+        '''Remove a function added with add_listener()'''
+        self._listeners.remove((event, callback, length))
+
+    def _fire_events(self):
+        '''Call the listeners with the bricks added since the last call'''
+        if not self._listeners:
+            return
+
+        start = self._events_brick - self._offset
+        if start > self._index:
+            return
+        self._events_brick = self._offset + self._index + 1
+
+        # Bricks to check, with the previous one to detect the reversals
+        first = max(start - 1, 0)
+        renko = self._renko[first:self._index + 1, :self._public_cols]
+        trend = renko[:, self.col_trend]
+        previous_trend = trend[:-1] if first < start else np.append(0, trend[:-1])
+        bricks = renko[start - first:]
+        trend = trend[start - first:]
+
+        events = []
+        for (event, callback, length) in self._listeners:
+            if event == self.EVENT_BRICK:
+                fired = np.ones(bricks.shape[0], dtype=bool)
+            elif event == self.EVENT_REVERSAL:
+                fired = trend * previous_trend < 0
+            else:
+                fired = ((bricks[:, self.col_cons_up] == length)
+                         | (bricks[:, self.col_cons_down] == length))
+            events.append((fired, callback))
+
+        for row in np.flatnonzero(np.any([fired for (fired, _) in events], axis=0)):
+            for (fired, callback) in events:
+                if fired[row]:
+                    callback(self, self._offset + start + int(row), bricks[row])
+
+    def sequence(self):
+        '''Sequence number of the last brick, that is, its position in the
+        whole series. It is also the amount of completed bricks, as the
+        last one can still change.
+
+        :rtype: int
+        '''
+        return self._offset + max(self._index, 0)
+
+    def bricks_since(self, seq, ret_type=AS_NUMPY):
+        '''Bricks from the sequence number seq up to the last one
+
+        It lets consumers poll the renko without scanning get_renko(): a
+        consumer keeps the sequence() of the last brick it got, and asks
+        for the bricks since it, to get that brick updated and the new
+        ones.
+
+        :param seq: sequence number of the first brick to return
+        :type seq: int
+        :param ret_type: self.AS_NUMPY or self.AS_COLUMNS, as on
+            get_renko(). They are views on STORAGE_MATRIX and
+            STORAGE_COLUMNS respectively.
+        :type ret_type: str
+        :return: the bricks, empty when seq is after the last one
+        '''
+        first = self._first_brick()
+        if seq < first:
+            raise ValueError('The bricks before %d are not retained' % first)
+        seq = min(seq, self._offset + self._index + 1)
+
+        if ret_type == self.AS_NUMPY:
+            ret = self._get_matrix(seq)
+        elif ret_type == self.AS_COLUMNS:
+            ret = self._get_columns(seq)
+        else:
+            raise ValueError('Renko type %s is not supported' % ret_type)
+
+        return ret
+
+    def _new_quotes_compiled(self, prices, dates, volumes, brick_index=None):
+        '''Process a batch of quotes with the compiled kernel
+
+        The kernel stops before a quote that could overflow the renko array,
+        so the array is extended here and the kernel resumed. With
+        max_bricks, a quote that could add more bricks than the window is
+        passed to _new_brick(), that only writes the retained bricks of a
+        long gap, so the memory stays bounded.
+        '''
+        if _quotes_kernel_compiled is None and _compile_kernels() is None:
+            # numba is broken, the quotes take the pure Python path
+            self.compiled = False
+            self._new_quotes_batch(prices, dates, volumes, brick_index=brick_index)
+            return
+
+        empty = np.empty(0)
+        if brick_index is None:
+            brick_index = np.empty(0, dtype=np.int64)
         if dates is None:
-            dates = [None] * len(prices)
+            (dates, seconds) = (np.empty(0, dtype=np.int64), empty)
         else:
-            dates = [self._convert_dates_to_timestamp(date) for date in dates]
-        if volumes is None:
-            volumes = [None] * len(prices)
+            seconds = _ns_to_seconds(dates)
+        volumes = empty if volumes is None else volumes
+        no_ns = np.empty((0, self._matrix_cols), dtype=np.int64)
+        renko_type = _TYPE_CODES[self._type]
+        grid_price = _GRID_PRICE_CODES[self._grid_price]
+
+        size = prices.shape[0]
+        position = 0
+        while True:
+            self._index, done = _quotes_kernel_compiled(
+                self._renko, self._renko_ns if self.ns_dates else no_ns, self._index,
+                prices[position:],
+                dates[position:] if dates.shape[0] else dates,
+                seconds[position:] if seconds.shape[0] else seconds,
+                volumes[position:] if volumes.shape[0] else volumes,
+                self.brick_size, renko_type, grid_price,
+                brick_index[position:] if brick_index.shape[0] else brick_index, self._offset,
+            )
+            position += done
+            if position >= size:
+                break
 
-        if self._index == -1:
-            self._initial_brick(prices[0], dates[0], volumes[0])
-            return self.new_quotes(prices[1:], dates[1:], volumes[1:])
+            min_rows = _kernel_max_new_bricks(
+                prices[position], self._renko[self._index, self.col_price_renko],
+                self.brick_size,
+            )
+            if self.max_bricks is not None and min_rows > self.max_bricks:
+                stop = position + 1
+                self._new_quotes_batch(
+                    prices[position:stop],
+                    dates[position:stop] if dates.shape[0] else None,
+                    volumes[position:stop] if volumes.shape[0] else None,
+                    brick_index=brick_index[position:stop] if brick_index.shape[0] else None,
+                )
+                position = stop
+                if position >= size:
+                    break
+                continue
+
+            self._make_room(min_rows)
+
+    def _new_quotes_batch(self, prices, dates, volumes, brick_sizes=None, brick_index=None):
+        '''Process a batch of quotes with array operations
+
+        The quotes between two brick boundaries only update the last brick,
+        so they are located with a vectorized search and folded into the
+        last brick at once. A quote that crosses a boundary adds a single
+        brick at once, and only the gaps of several bricks are stepped
+        through :meth:`_new_brick`. While the bricks are short, the quotes
+        are stepped by :meth:`_new_quotes_dense` instead.
+
+        :param brick_sizes: brick size of the bricks added by each quote.
+            Defaults to None, to keep brick_size.
+        :type brick_sizes: numpy.ndarray
+        :param brick_index: array filled with the brick of each quote, as
+            on new_quotes()
+        :type brick_index: numpy.ndarray
+        '''
+        size = prices.shape[0]
+        start = 0
+        chunk = self._scan_chunk_min
+        block = self._scan_chunk_min
+        seconds = None if dates is None else _ns_to_seconds(dates)
+
+        while start < size:
+            if chunk == self._scan_chunk_min:
+                # Short bricks: step the quotes, in growing blocks
+                (start, dense) = self._new_quotes_dense(prices, dates, seconds, volumes, brick_sizes,
+                                                        brick_index, start, min(start + block, size))
+                if dense:
+                    block = min(block * 2, self._dense_block)
+                    continue
+                # A long brick: search its end
+                block = self._scan_chunk_min
+                chunk = 2 * self._scan_chunk_min
 
-        for (price, date, volume) in zip(prices, dates, volumes):
             last_brick = self._renko[self._index]
+            price_min = last_brick[self.col_price_min]
+            price_max = last_brick[self.col_price_max]
+
+            # Search the next quote out of the brick, in growing windows
+            cross = -1
+            stop = start
+            while stop < size:
+                end = min(stop + chunk, size)
+                window = prices[stop:end]
+                hits = np.flatnonzero((window >= price_max) | (window <= price_min))
+                if hits.shape[0] > 0:
+                    cross = stop + int(hits[0])
+                    break
+                stop = end
+                chunk = min(chunk * 2, self._scan_chunk_max)
+
+            seg_end = size if cross == -1 else cross
+            if seg_end > start:
+                # The quotes are in the same renko brick
+                if brick_index is not None:
+                    brick_index[start:seg_end] = self._offset + self._index
+                last_brick[self.col_price_last] = prices[seg_end - 1]
+                last_brick[self.col_count] += seg_end - start
+                if dates is not None:
+                    last_brick[self.col_dt_end] = seconds[seg_end - 1]
+                    if self.ns_dates:
+                        self._renko_ns[self._index, self._col_ns_end] = dates[seg_end - 1]
+                if volumes is not None:
+                    # Accumulate in order, to match the tick by tick sum
+                    last_brick[self.col_volume] = np.add.accumulate(np.concatenate((
+                        last_brick[self.col_volume:self.col_volume + 1],
+                        volumes[start:seg_end],
+                    )))[-1]
+
+            if cross == -1:
+                break
 
-            if price >= last_brick[self.col_price_max]:
-                if date is not None:
-                    last_brick[self.col_dt_end] = date
-                self._new_brick(price, date, volume)
-            elif price <= last_brick[self.col_price_min]:
-                if date is not None:
-                    last_brick[self.col_dt_end] = date
-                self._new_brick(price, date, volume)
-            else:
-                # The quote is in the same renko brick
-                last_brick[self.col_price_last] = price
-                last_brick[self.col_count] += 1
-                if date is not None:
-                    last_brick[self.col_dt_end] = date
-                if volume is not None:
-                    last_brick[self.col_volume] += volume
+            # Next search window sized after the last brick length
+            chunk = min(max(2 * (cross - start), self._scan_chunk_min),
+                        self._scan_chunk_max)
+            if chunk == self._scan_chunk_min:
+                start = cross
+                continue
+
+            if brick_sizes is not None:
+                self.brick_size = float(brick_sizes[cross])
+            self._cross_quote(
+                last_brick, float(prices[cross]),
+                None if dates is None else int(dates[cross]),
+                None if dates is None else float(seconds[cross]),
+                None if volumes is None else float(volumes[cross]),
+            )
+            if brick_index is not None:
+                brick_index[cross] = self._offset + self._index
 
-        pass
+            start = cross + 1
+
+    def _cross_quote(self, last_brick, price, date, seconds, volume):
+        '''Add the bricks of a quote that crosses a boundary of last_brick
+
+        A quote that adds a single brick is written at once, and the gaps
+        of several bricks are stepped through _new_brick().
+        '''
+        if date is not None:
+            last_brick[self.col_dt_end] = seconds
+            if self.ns_dates:
+                self._renko_ns[self._index, self._col_ns_end] = date
+
+        new_brick = self._next_brick(last_brick[:self._public_cols].tolist(), price)
+        if new_brick is not None:
+            (new_brick, inside) = new_brick
+            if date is not None:
+                new_brick[self.col_dt_start] = new_brick[self.col_dt_end] = seconds
+            if inside:
+                new_brick[self.col_count] = 1
+                if volume is not None:
+                    new_brick[self.col_volume] = volume
+
+            if self._index + 1 >= self._renko.shape[0]:
+                self._make_room(1)
+            self._index += 1
+            self._set_brick(new_brick, date)
+            if inside:
+                return
+
+        self._new_brick(price, date, volume)
+
+    def _new_quotes_dense(self, prices, dates, seconds, volumes, brick_sizes, brick_index, start, stop):
+        '''Step the quotes start:stop one by one, while the bricks are short
+
+        On dense series most quotes cross a boundary, and a vectorized
+        search costs more than it saves. The quotes are stepped as Python
+        scalars, keeping the last brick on local variables. The bricks are
+        written on the renko numpy array at once at the end, or before a gap
+        of several bricks, whose first brick is computed here and the rest
+        are added by _new_brick().
+
+        :return: tuple with the position of the next quote to process, and
+            False if it stopped on a brick longer than _scan_probe quotes
+        :rtype: tuple
+        '''
+        # Room for one brick per quote, so nothing is moved until the end
+        if self._index + 1 >= self._renko.shape[0]:
+            self._make_room(1)
+        stop = min(stop, start + self._renko.shape[0] - self._index - 1)
+
+        price_list = prices[start:stop].tolist()
+        date_list = None if dates is None else dates[start:stop].tolist()
+        seconds_list = None if dates is None else seconds[start:stop].tolist()
+        volume_list = None if volumes is None else volumes[start:stop].tolist()
+        index_list = None if brick_index is None else []
+
+        col_price_last = self.col_price_last
+        col_dt_end = self.col_dt_end
+        col_volume = self.col_volume
+        col_count = self.col_count
+
+        # Finished bricks, and the last one
+        bricks = []
+        bricks_ns = []
+        brick = self._renko[self._index, :self._public_cols].tolist()
+        brick_ns = self._last_brick_ns()
+        price_min = brick[self.col_price_min]
+        price_max = brick[self.col_price_max]
+
+        size = len(price_list)
+        position = 0
+        first = 0
+        dense = True
+        while position < size:
+            price = price_list[position]
+            if price_min < price < price_max:
+                # The quote is in the same renko brick
+                brick[col_price_last] = price
+                brick[col_count] += 1
+                if volume_list is not None:
+                    brick[col_volume] += volume_list[position]
+                if date_list is not None:
+                    brick[col_dt_end] = seconds_list[position]
+                    brick_ns[1] = date_list[position]
+                if index_list is not None:
+                    index_list.append(self._offset + self._index + len(bricks))
+
+                position += 1
+                if position - first >= self._scan_probe:
+                    # A long brick: search its end
+                    dense = False
+                    break
+                continue
+
+            if date_list is not None:
+                brick[col_dt_end] = seconds_list[position]
+                brick_ns[1] = date_list[position]
+            if brick_sizes is not None:
+                self.brick_size = float(brick_sizes[start + position])
+
+            new_brick = self._next_brick(brick, price)
+            if new_brick is not None:
+                bricks.append(brick)
+                bricks_ns.append(brick_ns)
+                (brick, inside) = new_brick
+                if date_list is not None:
+                    brick[self.col_dt_start] = brick[col_dt_end] = seconds_list[position]
+                    brick_ns = [date_list[position], date_list[position]]
+                else:
+                    brick_ns = [self._NAT, self._NAT]
+
+            if new_brick is None or not inside:
+                # Left to _new_brick(), that also counts the quote
+                self._write_bricks(bricks, bricks_ns, brick, brick_ns)
+                self._new_brick(
+                    price,
+                    None if date_list is None else date_list[position],
+                    None if volume_list is None else volume_list[position],
+                )
+                bricks = []
+                bricks_ns = []
+                brick = self._renko[self._index, :self._public_cols].tolist()
+                brick_ns = self._last_brick_ns()
+
+                # The next bricks need room again
+                room = self._renko.shape[0] - self._index - 1
+                if room < size - position - 1:
+                    size = position + 1 + room
+            else:
+                brick[col_count] = 1
+                if volume_list is not None:
+                    brick[col_volume] = volume_list[position]
+
+            price_min = brick[self.col_price_min]
+            price_max = brick[self.col_price_max]
+            if index_list is not None:
+                index_list.append(self._offset + self._index + len(bricks))
+
+            position += 1
+            first = position
+
+        self._write_bricks(bricks, bricks_ns, brick, brick_ns)
+        if brick_index is not None:
+            brick_index[start:start + position] = index_list
+
+        return (start + position, dense)
+
+    def _write_bricks(self, bricks, bricks_ns, brick, brick_ns):
+        '''Write the bricks finished by _new_quotes_dense() from the last
+        row of the renko numpy array, followed by the new last brick'''
+        start = self._index
+        stop = start + len(bricks) + 1
+        bricks.append(brick)
+        bricks_ns.append(brick_ns)
+        self._renko[start:stop, :self._public_cols] = bricks
+        if self.ns_dates:
+            self._renko_ns[start:stop, self._col_ns_start:self._col_ns_end + 1] = bricks_ns
+        self._index = stop - 1
 
     def get_renko(self, ret_type=AS_NUMPY):
         '''Return a renko representation
@@ -376,15 +1390,241 @@ class RenkoFixBrickSize_Fast(Renko):
             - self.AS_DATAFRAME: returns a Pandas.DataFrame, which is more
                 friendly and easy to process, but slower. Avoid this method
                 on Reinforcement Learning.
+            - self.AS_COLUMNS: returns a dictionary with a typed numpy array
+                per column. The dates are int64 nanoseconds, with
+                int64 min as missing value. No copy is done on
+                STORAGE_COLUMNS.
+            - self.AS_ARROW: returns a pyarrow.Table over the typed
+                columns, with UTC timestamp dates and null as missing
+                value. No copy is done on STORAGE_COLUMNS. Needs pyarrow.
+            - self.AS_ARROW_DATAFRAME: returns a Pandas.DataFrame backed
+                by the AS_ARROW table, without copying it.
         :type ret_type: str
         '''
         if ret_type == self.AS_NUMPY:
-            ret = self._renko[:self._index + 1]
+            ret = self._get_matrix()
         elif ret_type == self.AS_DATAFRAME:
+            import pandas as pd
             ret = pd.DataFrame(
-                self._renko[:self._index + 1],
+                self._get_matrix(),
                 columns=[self.as_dataframe_colnames]
             )
+        elif ret_type == self.AS_COLUMNS:
+            ret = self._get_columns()
+        elif ret_type == self.AS_ARROW:
+            ret = self._get_arrow()
+        elif ret_type == self.AS_ARROW_DATAFRAME:
+            import pandas as pd
+            ret = self._get_arrow().to_pandas(types_mapper=pd.ArrowDtype)
+        else:
+            raise ValueError('Renko type %s is not supported' % ret_type)
+
+        return ret
+
+    def _get_matrix(self, first=None):
+        '''The bricks on the float matrix layout, from the position first of
+        the whole series. Defaults to the first retained brick.'''
+        if first is None:
+            first = self._first_brick()
+        if self._storage == self.STORAGE_MATRIX:
+            return self._renko[first - self._offset:self._index + 1, :self._public_cols]
+
+        columns = self._get_columns(first)
+        ret = np.empty((columns['trend'].shape[0], self._public_cols))
+        for (col, name) in enumerate(self.as_dataframe_colnames):
+            if name in ('dt_start', 'dt_end'):
+                ret[:, col] = _ns_to_seconds(columns[name])
+            else:
+                ret[:, col] = columns[name]
+
+        return ret
+
+    def _get_columns(self, first=None):
+        '''The bricks as typed columns, from the position first of the whole
+        series. Defaults to the first retained brick.'''
+        if first is None:
+            first = self._first_brick()
+        if self._storage == self.STORAGE_MATRIX:
+            renko = self._renko[first - self._offset:self._index + 1]
+            columns = self._new_columns(renko.shape[0], np.float64)
+            self._matrix_to_columns(renko, columns, 0)
+            return columns
+
+        # The bricks on the float matrix are stored, but not spilled, as
+        # the last one can still change
+        self._store_columns(0, self._index + 1)
+        size = self._offset + self._index + 1
+
+        return {name: column[first:size] for (name, column) in self._columns.items()}
+
+    def _get_arrow(self):
+        '''All the bricks as a pyarrow.Table that shares the memory of the
+        typed columns'''
+        try:
+            import pyarrow
+        except ImportError:
+            raise ImportError('pyarrow is needed to export the bricks to Arrow')
+
+        columns = self._get_columns()
+        arrays = []
+        for name in self.as_dataframe_colnames:
+            column = columns[name]
+            if name in ('dt_start', 'dt_end'):
+                missing = column == self._NAT
+                validity = None
+                if missing.any():
+                    validity = pyarrow.py_buffer(np.packbits(~missing, bitorder='little'))
+                arrays.append(pyarrow.Array.from_buffers(
+                    pyarrow.timestamp('ns', tz='UTC'), column.shape[0],
+                    [validity, pyarrow.py_buffer(column)],
+                ))
+            else:
+                arrays.append(pyarrow.array(column))
+
+        return pyarrow.Table.from_arrays(arrays, names=self.as_dataframe_colnames)
+
+    def save(self, path):
+        '''Save the state of the renko to a binary file, to be restored with
+        RenkoFixBrickSize_Fast.load() and keep receiving quotes
+
+        The file is replaced at once when it is complete, so the renko can
+        be saved on the file that it was loaded from.
+
+        :param path: path of the file
+        :type path: str
+        '''
+        self._update_stats()
+
+        # Only the retained bricks are saved
+        start = self._window_start()
+        arrays = {'renko': self._renko[start:self._index + 1]}
+        if self._storage == self.STORAGE_COLUMNS:
+            for (name, column) in self._columns.items():
+                arrays['column_' + name] = column[:self._offset]
+        arrays.update(self._snapshot_arrays())
+
+        header = self._snapshot_header(start)
+        if self._storage == self.STORAGE_COLUMNS:
+            header['price_dtype'] = self._columns['price_renko'].dtype.str
+
+        _write_snapshot(path, header, arrays)
+
+    def _snapshot_header(self, start):
+        '''State of the renko to save, with the bricks from the row start'''
+        return {
+            'brick_size': self.brick_size,
+            'name': self.name,
+            'initial_size': self.initial_size,
+            'increment_pct': self.increment_pct,
+            'renko_type': self._type,
+            'grid_price': None if self._grid_price is None else self._grid_price.value,
+            'storage': self._storage,
+            'max_bricks': self.max_bricks,
+            'ns_dates': self.ns_dates,
+            'index': self._index - start,
+            'offset': self._offset + start,
+            'stats_bricks': self._stats_bricks,
+            'stats_dropped': self._stats_dropped,
+            'count_sum': float(self._count_sum),
+            'equal_trend': self._equal_trend,
+            'changed_trend': self._changed_trend,
+        }
+
+    def _snapshot_arrays(self):
+        '''Other arrays of the state to save'''
+        return {}
+
+    @classmethod
+    def _snapshot_kwargs(cls, header):
+        '''Other arguments of the constructor to restore a snapshot'''
+        return {}
+
+    def _restore_snapshot(self, header, arrays):
+        '''Restore the other state saved on the snapshot'''
+        pass
+
+    def flush(self):
+        '''Write the bricks and the state of a renko with storage_path to
+        its file. After a flush, the file can be restored with
+        RenkoFixBrickSize_Fast.load().'''
+        if self.storage_path is None:
+            return
+
+        self._update_stats()
+        self._renko.flush()
+
+        header = self._snapshot_header(0)
+        header['arrays'] = {'renko': {
+            'dtype': self._renko.dtype.str,
+            'shape': self._renko.shape,
+            'offset': _STORE_DATA_START,
+        }}
+        with open(self.storage_path, 'r+b') as f:
+            _write_snapshot_header(f, header, _STORE_DATA_START)
+
+    def _open_store(self, rows):
+        '''Map rows bricks of the storage_path file as self._renko'''
+        with open(self.storage_path, 'r+b') as f:
+            f.truncate(_STORE_DATA_START + rows * self._renko_cols * 8)
+        self._set_matrix(np.memmap(self.storage_path, dtype=np.float64, mode='r+',
+                                   offset=_STORE_DATA_START, shape=(rows, self._renko_cols)))
+        self.flush()
+
+    @classmethod
+    def load(cls, path, mmap=True, **kwargs):
+        '''Restore a renko saved with save()
+
+        :param path: path of the file
+        :type path: str
+        :param mmap: map the bricks from the file instead of reading them,
+            so the renko is ready without reading the whole file. The file
+            is mapped copy-on-write: it is never modified.
+        :type mmap: bool
+        :param kwargs: other arguments of the constructor, like compiled
+        :return: the restored renko
+        :rtype: RenkoFixBrickSize_Fast
+        '''
+        (header, arrays) = _read_snapshot(path, mmap)
+
+        if header['grid_price'] is not None:
+            kwargs['grid_price'] = GridPrice(header['grid_price'])
+        if 'price_dtype' in header:
+            kwargs['price_dtype'] = np.dtype(header['price_dtype'])
+        # The snapshots before ns_dates always had the nanoseconds
+        kwargs['ns_dates'] = header.get('ns_dates', True)
+        kwargs.update(cls._snapshot_kwargs(header))
+
+        ret = cls(
+            header['brick_size'],
+            name=header['name'],
+            initial_size=header['initial_size'],
+            increment_pct=header['increment_pct'],
+            renko_type=header['renko_type'],
+            storage=header['storage'],
+            max_bricks=header['max_bricks'],
+            **kwargs
+        )
+
+        if arrays['renko'].shape[1] < ret._renko_cols:
+            arrays['renko'] = _with_ns_columns(arrays['renko'])
+
+        if ret.max_bricks is not None or arrays['renko'].shape[0] == 0:
+            # Keep the fixed size memory, or the empty one
+            ret._renko[:arrays['renko'].shape[0]] = arrays['renko']
+        else:
+            ret._set_matrix(arrays['renko'])
+        if ret._storage == cls.STORAGE_COLUMNS:
+            for name in ret._columns:
+                ret._columns[name] = arrays['column_' + name]
+
+        ret._index = header['index']
+        ret._offset = header['offset']
+        ret._stats_bricks = header['stats_bricks']
+        ret._stats_dropped = header['stats_dropped']
+        ret._count_sum = np.float64(header['count_sum'])
+        ret._equal_trend = header['equal_trend']
+        ret._changed_trend = header['changed_trend']
+        ret._restore_snapshot(header, arrays)
 
         return ret
 
@@ -392,7 +1632,11 @@ class RenkoFixBrickSize_Fast(Renko):
         '''
         Some performance metrics that could be useful to evaluate in a
         Reinforcement Learning model. This function should be extended
-        by the user.
+        by the user. With max_bricks, they are evaluated over the retained
+        bricks.
+
+        The metrics are kept up to date incrementally as the bricks are
+        added, so the cost does not depend on the amount of bricks.
         :return: dictionary with the following keys:
             - count: count of underlying quotes
             - renko_bricks: count of renko bricks
@@ -401,24 +1645,45 @@ class RenkoFixBrickSize_Fast(Renko):
             - balance: scoring function
             - score: scoring function
         '''
+        self._update_stats()
+
+        if self._index == -1:
+            count = self._count_sum
+            renko_bricks = 0
+        else:
+            count = self._count_sum + self._renko[self._index, self.col_count]
+            renko_bricks = self._offset + self._index - self._first_brick() + 1
+
+        return self._performance(count, renko_bricks, self._equal_trend, self._changed_trend)
+
+    def _performance_full(self):
+        '''performance() computed over all the bricks'''
         renko = self.get_renko()
 
         count = renko[:, self.col_count].sum()
-        renko_bricks = self._index + 1
-
-        try:
-            price_to_brick_ratio = count / renko_bricks
-        except ZeroDivisionError:
-            price_to_brick_ratio = 0
+        renko_bricks = renko.shape[0]
 
         trend = renko[:, self.col_trend]
-        sign_changes = (trend != self._shift(trend, 1)).sum() - 2
-        if sign_changes < 0:
-            sign_changes = 0
+        if self._first_brick() == 0:
+            # The initial brick has no trend, so it is not compared
+            trend = trend[1:]
 
-        equal_trend = trend[2:] == trend[1:-1]
+        equal_trend = trend[1:] == trend[:-1]
         equal_trend_true = equal_trend.sum()
         equal_trend_false = equal_trend.shape[0] - equal_trend_true
+
+        return self._performance(count, renko_bricks, equal_trend_true, equal_trend_false)
+
+    def _performance(self, count, renko_bricks, equal_trend_true, equal_trend_false):
+        '''performance() dictionary, given the count of quotes, the count
+        of bricks and the amount of consecutive bricks with the same and
+        with different trend'''
+        if renko_bricks > 0:
+            price_to_brick_ratio = count / renko_bricks
+        else:
+            price_to_brick_ratio = 0
+
+        sign_changes = equal_trend_false
         balance = 1 * equal_trend_true - 2 * equal_trend_false
 
         if sign_changes == 0:
@@ -442,59 +1707,77 @@ class RenkoFixBrickSize_Fast(Renko):
 
         return ret
 
-    def graph(self, title=None, col_up='green', col_down='red'):
-        '''Draw a Renko representation'''
-
+    def _update_stats(self):
+        '''Update the running performance() metrics with the bricks added
+        and dropped since the last call. It must be called before moving
+        bricks out of self._renko.'''
+        if self._index == -1:
+            return
+
+        last = self._offset + self._index
+        if self._stats_bricks <= last:
+            # From the last brick of the previous call, that was still open
+            start = max(self._stats_bricks - 1, 0)
+            renko = self._renko[start - self._offset:self._index + 1]
+
+            self._count_sum += renko[:-1, self.col_count].sum()
+
+            trend = renko[:, self.col_trend]
+            if start == 0:
+                # The initial brick has no trend, so it is not compared
+                trend = trend[1:]
+            equal_trend = trend[1:] == trend[:-1]
+            equal_trend_true = int(equal_trend.sum())
+            self._equal_trend += equal_trend_true
+            self._changed_trend += equal_trend.shape[0] - equal_trend_true
+
+            self._stats_bricks = last + 1
+
+        first = self._first_brick()
+        if self._stats_dropped < first:
+            # Bricks out of the max_bricks window, with the next one to
+            # remove their trend comparison
+            renko = self._renko[self._stats_dropped - self._offset:first - self._offset + 1]
+
+            self._count_sum -= renko[:-1, self.col_count].sum()
+
+            trend = renko[:, self.col_trend]
+            if self._stats_dropped == 0:
+                trend = trend[1:]
+            equal_trend = trend[1:] == trend[:-1]
+            equal_trend_true = int(equal_trend.sum())
+            self._equal_trend -= equal_trend_true
+            self._changed_trend -= equal_trend.shape[0] - equal_trend_true
+
+            self._stats_dropped = first
+
+    def graph(self, title=None, col_up='green', col_down='red', start=None, stop=None,
+              max_rectangles=10000, ax=None):
+        '''Draw a Renko representation
+
+        All the bricks are drawn as a single collection of rectangles.
+
+        :param start: position of the first brick to draw, as on
+            get_renko(). Defaults to the first one.
+        :type start: int
+        :param stop: position after the last brick to draw. Defaults to
+            after the last one.
+        :type stop: int
+        :param max_rectangles: maximum amount of rectangles. Longer ranges
+            are decimated: consecutive bricks are drawn as a single
+            rectangle from the lowest to the highest one, with the color
+            of the trend between them.
+        :type max_rectangles: int
+        :param ax: matplotlib axes where the bricks are drawn. Defaults to
+            None, to draw them on a new figure and show it.
+        :return: the matplotlib axes
+        '''
         if title is None:
             title = 'Renko chart - bs: %f' % self.brick_size
 
-        fig, ax = plt.subplots(1, figsize=(20, 10))
-        ax.set_title(title)
-        ax.set_xlabel('Renko bars')
-        ax.set_ylabel('Price')
-
         renko = self.get_renko()
-        renko_prices = renko[:, self.col_price_renko]
-        renko_trends = renko[:, self.col_trend]
-
-        # Calculate the limits of axes
-        ax.set_xlim(0.0, len(renko_prices) + 1.0)
-
-        if renko.shape[0] > 0:
-            ax.set_ylim(np.min(renko_prices) - 3.0 * self.brick_size,
-                        np.max(renko_prices) + 3.0 * self.brick_size)
-
-        # Plot each renko bar
-        for index in range(1, len(renko_prices)):
-            # Set basic params for patch rectangle
-            col = col_up if renko_trends[index] == 1 else col_down
-            x = index
-            y = renko_prices[index] - self.brick_size \
-                if renko_trends[index] == 1 else renko_prices[index]
-
-            # Draw bar with params
-            ax.add_patch(patches.Rectangle(
-                (x, y),   # (x,y)
-                1.0,     # width
-                self.brick_size, # height
-                facecolor = col,
-            ))
-
-        plt.show()
-
-    def _convert_dates_to_timestamp(self, date):
-        if date is None:
-            ret = None
-        elif isinstance(date, float) or isinstance(date, int):
-            ret = date
-        elif isinstance(date, pd.Timestamp):
-            ret = date.timestamp()
-        elif isinstance(date, datetime.date):
-            ret = calendar.timegm(date.timetuple())
-        else:
-            raise Exception('Date class not supported')
-
-        return ret
+        return _graph(renko[:, self.col_price_renko], renko[:, self.col_trend], self.brick_size,
+                      title, col_up, col_down, start, stop, max_rectangles, ax)
 
     def _shift(self, arr, num, fill_value=np.nan):
         '''https://stackoverflow.com/questions/30399534/shift-elements-in-a-numpy-array'''
@@ -510,3 +1793,717 @@ class RenkoFixBrickSize_Fast(Renko):
             result[:] = arr
 
         return result
+
+
+class RenkoAdaptiveBrickSize_Fast(RenkoFixBrickSize_Fast):
+    '''Renko with a brick size that follows the volatility or the price
+
+    Each brick takes its size when it is added: atr_multiplier times the
+    ATR of the quotes, or brick_pct of the price of the quote that adds it.
+    The ATR is the mean absolute change between consecutive quotes over the
+    last atr_period quotes, kept as a running sum over a ring buffer, so it
+    costs O(1) per quote and does not depend on how the quotes are split
+    in batches.
+
+    The bricks have the layout of RenkoFixBrickSize_Fast, and brick_size is
+    the size of the last brick. The quotes are processed with array
+    operations, as the compiled kernel works with a fixed brick size.
+    save() and load() keep the settings and the ATR, and storage_path is
+    not supported.
+    '''
+
+    def __init__(self, brick_size, name=None, atr_period=None, atr_multiplier=1., brick_pct=None,
+                 min_brick_size=None, **kwargs):
+        '''RenkoAdaptiveBrickSize_Fast Constructor
+
+        :param brick_size: size of the first brick, and of the next ones
+            while there is no ATR
+        :type brick_size: int or float
+        :param atr_period: amount of quotes of the ATR, to size the bricks
+            after the volatility
+        :type atr_period: int
+        :param atr_multiplier: brick size in ATRs
+        :type atr_multiplier: float
+        :param brick_pct: brick size as a fraction of the price, like .01
+            for 1%, instead of the ATR
+        :type brick_pct: float
+        :param min_brick_size: minimum brick size. Defaults to 1% of
+            brick_size.
+        :type min_brick_size: float
+        :param kwargs: other arguments of RenkoFixBrickSize_Fast. TypeGrid
+            is not supported, as its grid needs a fixed brick size.
+        '''
+        if (atr_period is None) == (brick_pct is None):
+            raise ValueError('Either atr_period or brick_pct must be given')
+        if atr_period is not None and atr_period < 1:
+            raise ValueError('atr_period must be positive')
+        if kwargs.get('renko_type') == Renko.TypeGrid:
+            raise ValueError('TypeGrid is not supported with adaptive brick sizes')
+        if kwargs.get('storage_path') is not None:
+            raise ValueError('storage_path is not supported with adaptive brick sizes')
+
+        kwargs['compiled'] = False
+        RenkoFixBrickSize_Fast.__init__(self, brick_size, name, **kwargs)
+
+        self.atr_period = atr_period
+        self.atr_multiplier = float(atr_multiplier)
+        self.brick_pct = brick_pct
+        self.min_brick_size = self.brick_size / 100 if min_brick_size is None else float(min_brick_size)
+        if self.min_brick_size <= 0:
+            raise ValueError('min_brick_size must be positive')
+
+        self._initial_brick_size = self.brick_size
+        self._changes = np.zeros(atr_period or 0)
+        self._reset_atr()
+
+    def _reset_atr(self):
+        '''Forget the quotes of the ATR'''
+        # Last quote, absolute changes of the last atr_period quotes on a
+        # ring buffer with its next position, their sum and the amount of
+        # changes seen
+        self._last_price = None
+        self._changes[:] = 0
+        self._changes_pos = 0
+        self._changes_sum = np.float64(0)
+        self._changes_count = 0
+
+    def reset(self):
+        '''Discard all the bricks and the ATR, as
+        RenkoFixBrickSize_Fast.reset()'''
+        RenkoFixBrickSize_Fast.reset(self)
+        self.brick_size = self._initial_brick_size
+        self._reset_atr()
+
+    def _initial_brick(self, price, date, volume):
+        RenkoFixBrickSize_Fast._initial_brick(self, price, date, volume)
+        self._last_price = price
+
+    def _snapshot_header(self, start):
+        '''State of the renko to save, with the adaptive settings and the
+        ATR. brick_size is the size of the last brick.'''
+        ret = RenkoFixBrickSize_Fast._snapshot_header(self, start)
+        ret.update({
+            'atr_period': self.atr_period,
+            'atr_multiplier': self.atr_multiplier,
+            'brick_pct': self.brick_pct,
+            'min_brick_size': self.min_brick_size,
+            'initial_brick_size': self._initial_brick_size,
+            'last_price': None if self._last_price is None else float(self._last_price),
+            'changes_pos': self._changes_pos,
+            'changes_sum': float(self._changes_sum),
+            'changes_count': self._changes_count,
+        })
+        return ret
+
+    def _snapshot_arrays(self):
+        return {'atr_changes': self._changes}
+
+    @classmethod
+    def _snapshot_kwargs(cls, header):
+        return {name: header[name] for name in ('atr_period', 'atr_multiplier', 'brick_pct', 'min_brick_size')}
+
+    def _restore_snapshot(self, header, arrays):
+        self._initial_brick_size = header['initial_brick_size']
+        self._last_price = header['last_price']
+        self._changes[:] = arrays['atr_changes']
+        self._changes_pos = header['changes_pos']
+        self._changes_sum = np.float64(header['changes_sum'])
+        self._changes_count = header['changes_count']
+
+    def _brick_sizes(self, prices):
+        '''Brick size after each quote, updating the ATR'''
+        if self.brick_pct is not None:
+            sizes = self.brick_pct * np.abs(prices)
+        else:
+            size = prices.shape[0]
+            period = self.atr_period
+            changes = np.abs(np.diff(prices, prepend=self._last_price))
+
+            # The changes that leave the window: first the ones of the ring
+            # buffer, then the ones of this batch
+            kept = min(size, period)
+            positions = (self._changes_pos + np.arange(kept)) % period
+            removed = np.concatenate((self._changes[positions], changes[:size - kept]))
+            self._changes[positions] = changes[size - kept:]
+            self._changes_pos = (self._changes_pos + kept) % period
+
+            # Accumulate in order, to match the quote by quote sum
+            sums = np.add.accumulate(np.concatenate(([self._changes_sum], changes - removed)))[1:]
+            counts = np.minimum(self._changes_count + np.arange(1, size + 1), period)
+            self._changes_sum = sums[-1]
+            self._changes_count += size
+
+            sizes = np.where(sums > 0, self.atr_multiplier * sums / counts, self._initial_brick_size)
+
+        self._last_price = prices[-1]
+        return np.maximum(sizes, self.min_brick_size)
+
+    def _new_quotes_batch(self, prices, dates, volumes, brick_sizes=None, brick_index=None):
+        if prices.shape[0] == 0:
+            return
+
+        RenkoFixBrickSize_Fast._new_quotes_batch(self, prices, dates, volumes, self._brick_sizes(prices),
+                                                 brick_index)
+
+
+# Missing date on the nanoseconds columns
+_NAT = RenkoFixBrickSize_Fast._NAT
+
+
+def dates_to_ns(dates):
+    '''Convert dates to int64 nanoseconds since the epoch, in a single
+    vectorized step
+
+    Numbers are epoch seconds, datetime64 values and dates without timezone
+    are UTC, and missing dates are int64 min. Use datetime64[ns] arrays to
+    give nanoseconds without conversion. Float seconds from April 1970,
+    coarser than a nanosecond, convert back to the same float on the
+    dt_start and dt_end columns. Numbers out of the range of int64
+    nanoseconds, like epoch milliseconds, raise ValueError.
+
+    :param dates: dates to convert
+    :type dates: numpy.ndarray of datetime64 or numbers, pandas.DatetimeIndex,
+        pandas.Series, or list of pandas.Timestamp, datetime.date or numbers
+    :return: nanoseconds of each date
+    :rtype: numpy.ndarray of int64
+    '''
+    # pandas objects can only be given if pandas was imported
+    pd = sys.modules.get('pandas')
+    if pd is not None:
+        if isinstance(dates, (pd.Series, pd.Index)) and not isinstance(dates, pd.DatetimeIndex):
+            if isinstance(dates.dtype, pd.DatetimeTZDtype):
+                dates = pd.DatetimeIndex(dates)
+            else:
+                dates = dates.to_numpy()
+
+        if isinstance(dates, pd.DatetimeIndex):
+            # The values of dates with timezone are in UTC
+            dates = dates.values
+
+    dates = np.asarray(dates)
+    if dates.dtype.kind == 'O':
+        try:
+            dates = dates.astype(np.float64)
+        except (TypeError, ValueError):
+            import pandas as pd
+            return dates_to_ns(pd.to_datetime(dates, utc=True))
+
+    if dates.dtype.kind == 'M':
+        return dates.astype('datetime64[ns]').view(np.int64)
+    if dates.dtype.kind in 'iub':
+        dates = dates.astype(np.int64)
+        _check_seconds(dates)
+        return dates * 1000000000
+    if dates.dtype.kind == 'f':
+        missing = np.isnan(dates)
+        dates = np.where(missing, 0, dates)
+        _check_seconds(dates)
+
+        # The whole and the fractional seconds apart, so the nanoseconds
+        # are exact and _ns_to_seconds() gives back the same float
+        whole = np.floor(dates)
+        ret = whole.astype(np.int64) * 1000000000 + np.round((dates - whole) * 1e9).astype(np.int64)
+        ret[missing] = _NAT
+        return ret
+
+    raise Exception('Date class not supported')
+
+
+# Maximum epoch seconds of int64 nanoseconds, on year 2262
+_MAX_SECONDS = np.iinfo(np.int64).max // 1000000000
+
+
+def _check_seconds(seconds):
+    '''Raise ValueError if epoch seconds are out of the int64 nanoseconds
+    range'''
+    if seconds.shape[0] > 0 and not (-_MAX_SECONDS <= seconds.min() and seconds.max() <= _MAX_SECONDS):
+        raise ValueError('Dates out of the range of epoch seconds: %s to %s' % (seconds.min(), seconds.max()))
+
+
+def _ns_to_seconds(dates):
+    '''Nanoseconds to float seconds since the epoch, NaN when missing
+
+    The whole and the fractional seconds are converted apart, so the
+    result is rounded once.
+    '''
+    if not isinstance(dates, np.ndarray):
+        return np.nan if dates == _NAT else dates // 1000000000 + dates % 1000000000 / 1e9
+
+    return np.where(dates == _NAT, np.nan, dates // 1000000000 + dates % 1000000000 / 1e9)
+
+
+def _with_ns_columns(renko):
+    '''Add the nanoseconds columns to a float matrix without them'''
+    ret = np.zeros((renko.shape[0], RenkoFixBrickSize_Fast._matrix_cols))
+    ret[:, :renko.shape[1]] = renko
+    ret_ns = ret.view(np.int64)
+    ret_ns[:, _COL_NS_START] = dates_to_ns(renko[:, _COL_DT_START])
+    ret_ns[:, _COL_NS_END] = dates_to_ns(renko[:, _COL_DT_END])
+
+    return ret
+
+
+def _graph(prices, trends, brick_size, title, col_up, col_down, start, stop,
+           max_rectangles, ax):
+    '''Draw renko bricks, given by their renko prices and trends, as a single
+    collection of rectangles. The parameters are the ones of
+    RenkoFixBrickSize_Fast.graph().'''
+    from matplotlib.collections import PolyCollection
+    from matplotlib.colors import to_rgba
+
+    prices = np.asarray(prices, dtype=np.float64)
+    trends = np.asarray(trends, dtype=np.float64)
+    (start, stop, _) = slice(start, stop).indices(prices.shape[0])
+
+    show = ax is None
+    if ax is None:
+        # pyplot selects a backend, so it is only imported to show the figure
+        import matplotlib.pyplot as plt
+        fig, ax = plt.subplots(1, figsize=(20, 10))
+    ax.set_title(title)
+    ax.set_xlabel('Renko bars')
+    ax.set_ylabel('Price')
+
+    # Calculate the limits of axes
+    ax.set_xlim(start, max(stop, start) + 1.0)
+    if stop > start:
+        ax.set_ylim(np.min(prices[start:stop]) - 3.0 * brick_size,
+                    np.max(prices[start:stop]) + 3.0 * brick_size)
+
+    # The initial brick has no trend, so it is not drawn
+    first = max(start, 1)
+    positions = np.arange(first, max(stop, first))
+    renko_prices = prices[first:first + positions.shape[0]]
+    up = trends[first:first + positions.shape[0]] == 1
+    bottom = renko_prices - np.where(up, brick_size, 0)
+    top = bottom + brick_size
+    width = np.ones(positions.shape[0])
+
+    if positions.shape[0] > max_rectangles:
+        # Level of detail: a rectangle per bucket of consecutive bricks
+        size = -(-positions.shape[0] // max_rectangles)
+        buckets = np.arange(0, positions.shape[0], size)
+        last = np.append(buckets[1:], positions.shape[0]) - 1
+        bottom = np.minimum.reduceat(bottom, buckets)
+        top = np.maximum.reduceat(top, buckets)
+        up = renko_prices[last] >= renko_prices[buckets]
+        width = (last - buckets + 1).astype(np.float64)
+        positions = positions[buckets]
+
+    vertices = np.empty((positions.shape[0], 4, 2))
+    vertices[:, 0, 0] = vertices[:, 3, 0] = positions
+    vertices[:, 1, 0] = vertices[:, 2, 0] = positions + width
+    vertices[:, 0, 1] = vertices[:, 1, 1] = bottom
+    vertices[:, 2, 1] = vertices[:, 3, 1] = top
+
+    colors = np.where(up[:, np.newaxis], to_rgba(col_up), to_rgba(col_down))
+    ax.add_collection(PolyCollection(vertices, facecolors=colors, edgecolors='none'))
+
+    if show:
+        plt.show()
+
+    return ax
+
+
+def aggregate_bricks(brick_index, prices, volumes=None):
+    '''Aggregate quotes by brick, with the brick_index filled by new_quotes()
+
+    The quotes of a brick are contiguous, so the aggregations are a single
+    vectorized pass. The bricks without quotes, added in the middle of a
+    move, have count 0 and NaN prices.
+
+    :param brick_index: brick of each quote, as filled by new_quotes()
+    :type brick_index: numpy.ndarray of int
+    :param prices: price of each quote
+    :type prices: numpy.ndarray
+    :param volumes: volume of each quote. Defaults to None, to not
+        aggregate volumes.
+    :type volumes: numpy.ndarray
+    :return: dictionary of numpy arrays with a row per brick, from the brick
+        of the first quote to the one of the last quote: 'brick' with the
+        brick position, 'count' with the amount of quotes, 'open', 'high',
+        'low' and 'close' prices, and with volumes, 'volume' and 'vwap'.
+    '''
+    brick_index = np.asarray(brick_index)
+    prices = np.asarray(prices, dtype=np.float64)
+    if brick_index.shape[0] == 0:
+        ret = {'brick': np.empty(0, dtype=np.int64), 'count': np.empty(0, dtype=np.int64)}
+        for name in ('open', 'high', 'low', 'close') + (() if volumes is None else ('volume', 'vwap')):
+            ret[name] = np.empty(0)
+        return ret
+
+    first = int(brick_index[0])
+    bricks = brick_index - first
+    size = int(bricks[-1]) + 1
+    if np.any(bricks[1:] < bricks[:-1]):
+        raise ValueError('brick_index must be non decreasing')
+
+    starts = np.flatnonzero(np.concatenate(([True], bricks[1:] != bricks[:-1])))
+    stops = np.append(starts[1:], bricks.shape[0]) - 1
+    rows = bricks[starts]
+
+    ret = {
+        'brick': np.arange(first, first + size, dtype=np.int64),
+        'count': np.bincount(bricks, minlength=size),
+    }
+    for (name, values) in (
+        ('open', prices[starts]),
+        ('high', np.maximum.reduceat(prices, starts)),
+        ('low', np.minimum.reduceat(prices, starts)),
+        ('close', prices[stops]),
+    ):
+        ret[name] = np.full(size, np.nan)
+        ret[name][rows] = values
+
+    if volumes is not None:
+        volumes = np.asarray(volumes, dtype=np.float64)
+        ret['volume'] = np.bincount(bricks, weights=volumes, minlength=size)
+        notional = np.bincount(bricks, weights=prices * volumes, minlength=size)
+        ret['vwap'] = np.full(size, np.nan)
+        np.divide(notional, ret['volume'], out=ret['vwap'], where=ret['volume'] != 0)
+
+    return ret
+
+
+def sweep(prices, brick_sizes, renko_types=(Renko.TypeRenko,), chunk_size=65536,
+          ret_type=RenkoFixBrickSize_Fast.AS_NUMPY, **kwargs):
+    '''Evaluate the performance of many brick sizes over the same prices
+
+    All the Renko series are built in a single pass over the prices: each
+    chunk of chunk_size prices is given to every series while it is still
+    on the CPU cache, instead of walking the whole prices once per series.
+
+    :param prices: prices to convert to Renko
+    :type prices: list of float or numpy.ndarray
+    :param brick_sizes: brick sizes to evaluate
+    :type brick_sizes: list of float or numpy.ndarray
+    :param renko_types: renko types to evaluate, for each brick size
+    :type renko_types: list of str
+    :param chunk_size: amount of prices given at once to each series
+    :type chunk_size: int
+    :param ret_type: RenkoFixBrickSize_Fast.AS_NUMPY to return a numpy
+        structured array, or RenkoFixBrickSize_Fast.AS_DATAFRAME
+    :type ret_type: str
+    :param kwargs: other arguments of RenkoFixBrickSize_Fast, like grid_price
+    :return: a row per brick size and renko type, with the brick_size,
+        renko_type and the RenkoFixBrickSize_Fast.performance() keys
+    '''
+    prices = np.asarray(prices, dtype=np.float64)
+
+    renkos = [
+        RenkoFixBrickSize_Fast(brick_size, renko_type=renko_type, **kwargs)
+        for renko_type in renko_types
+        for brick_size in brick_sizes
+    ]
+
+    for start in range(0, prices.shape[0], chunk_size):
+        chunk = prices[start:start + chunk_size]
+        for renko in renkos:
+            renko.new_quotes(chunk)
+
+    ret = np.zeros(len(renkos), dtype=[
+        ('brick_size', np.float64),
+        ('renko_type', 'U16'),
+        ('count', np.float64),
+        ('renko_bricks', np.int64),
+        ('price_to_brick_ratio', np.float64),
+        ('sign_changes', np.int64),
+        ('balance', np.int64),
+        ('score', np.float64),
+    ])
+    for (row, renko) in enumerate(renkos):
+        performance = renko.performance()
+        ret[row]['brick_size'] = renko.brick_size
+        ret[row]['renko_type'] = renko._type
+        for key in performance:
+            ret[row][key] = performance[key]
+
+    if ret_type == RenkoFixBrickSize_Fast.AS_DATAFRAME:
+        import pandas as pd
+        ret = pd.DataFrame(ret)
+
+    return ret
+
+
+# Binary format of RenkoFixBrickSize_Fast.save(): the magic bytes, the format
+# version and the length of the header as little endian uint32, the JSON
+# header, and the arrays listed on the header, each one aligned to
+# _SNAPSHOT_ALIGN bytes from the beginning of the file.
+_SNAPSHOT_MAGIC = b'RENKOFST'
+_SNAPSHOT_VERSION = 2
+_SNAPSHOT_ALIGN = 64
+
+# Offset of the bricks on the files of storage_path, leaving room for the
+# header to be rewritten
+_STORE_DATA_START = 4096
+
+
+def _snapshot_align(position):
+    return -(-position // _SNAPSHOT_ALIGN) * _SNAPSHOT_ALIGN
+
+
+def _write_snapshot(path, header, arrays):
+    '''Write a header dictionary and numpy arrays to path'''
+    arrays = {name: np.ascontiguousarray(array) for (name, array) in arrays.items()}
+
+    # The offsets of the arrays depend on the header length
+    header = dict(header, arrays={})
+    start = 0
+    while True:
+        position = start
+        for (name, array) in arrays.items():
+            header['arrays'][name] = {
+                'dtype': array.dtype.str,
+                'shape': array.shape,
+                'offset': position,
+            }
+            position = _snapshot_align(position + array.nbytes)
+
+        encoded = json.dumps(header).encode('utf-8')
+        data_start = _snapshot_align(len(_SNAPSHOT_MAGIC) + 8 + len(encoded))
+        if data_start == start:
+            break
+        start = data_start
+
+    # On a temporary file replacing path at the end, as the arrays can be
+    # mapped from path by load()
+    (fd, temp_path) = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                       prefix=os.path.basename(path), suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            _write_snapshot_header(f, header, start)
+            for (name, array) in arrays.items():
+                f.seek(header['arrays'][name]['offset'])
+                f.write(array.tobytes())
+            f.truncate(position)
+        os.replace(temp_path, path)
+    except BaseException:
+        os.remove(temp_path)
+        raise
+
+
+def _write_snapshot_header(f, header, data_start):
+    '''Write the magic bytes, the version and the header at the beginning of
+    the file f, that must fit before data_start'''
+    encoded = json.dumps(header).encode('utf-8')
+    if len(_SNAPSHOT_MAGIC) + 8 + len(encoded) > data_start:
+        raise ValueError('The renko snapshot header is too long')
+
+    f.seek(0)
+    f.write(_SNAPSHOT_MAGIC)
+    f.write(np.array([_SNAPSHOT_VERSION, len(encoded)], dtype='<u4').tobytes())
+    f.write(encoded)
+
+
+def _read_snapshot(path, mmap):
+    '''Read the header dictionary and the numpy arrays written by
+    _write_snapshot()'''
+    with open(path, 'rb') as f:
+        if f.read(len(_SNAPSHOT_MAGIC)) != _SNAPSHOT_MAGIC:
+            raise ValueError('%s is not a renko snapshot' % path)
+        (version, length) = np.frombuffer(f.read(8), dtype='<u4')
+        if version > _SNAPSHOT_VERSION:
+            raise ValueError('Renko snapshot version %d is not supported' % version)
+        header = json.loads(f.read(int(length)).decode('utf-8'))
+
+        arrays = {}
+        for (name, spec) in header.pop('arrays').items():
+            dtype = np.dtype(spec['dtype'])
+            shape = tuple(spec['shape'])
+            if mmap and np.prod(shape) > 0:
+                arrays[name] = np.memmap(f, dtype=dtype, mode='c',
+                                         offset=spec['offset'], shape=shape)
+            else:
+                f.seek(spec['offset'])
+                arrays[name] = np.fromfile(f, dtype=dtype, count=int(np.prod(shape))).reshape(shape)
+
+    return (header, arrays)
+
+
+# Integer codes of the renko types and grid prices, for the compiled kernel
+_TYPE_CODES = {
+    Renko.TypeRenko: 0,
+    Renko.TypeRenkoSymetric: 1,
+    Renko.TypeGrid: 2,
+}
+
+_GRID_PRICE_CODES = {
+    None: -1,
+    GridPrice.AVG: 0,
+    GridPrice.MIN: 1,
+    GridPrice.MAX: 2,
+}
+
+_COL_PRICE_LAST = RenkoFixBrickSize_Fast.col_price_last
+_COL_PRICE_RENKO = RenkoFixBrickSize_Fast.col_price_renko
+_COL_PRICE_MIN = RenkoFixBrickSize_Fast.col_price_min
+_COL_PRICE_MAX = RenkoFixBrickSize_Fast.col_price_max
+_COL_DT_START = RenkoFixBrickSize_Fast.col_dt_start
+_COL_DT_END = RenkoFixBrickSize_Fast.col_dt_end
+_COL_TREND = RenkoFixBrickSize_Fast.col_trend
+_COL_VOLUME = RenkoFixBrickSize_Fast.col_volume
+_COL_COUNT = RenkoFixBrickSize_Fast.col_count
+_COL_CONS_UP = RenkoFixBrickSize_Fast.col_cons_up
+_COL_CONS_DOWN = RenkoFixBrickSize_Fast.col_cons_down
+_COL_NS_START = RenkoFixBrickSize_Fast._col_ns_start
+_COL_NS_END = RenkoFixBrickSize_Fast._col_ns_end
+
+
+def _kernel_max_new_bricks(price, price_renko, brick_size):
+    '''Upper bound of the bricks that a single quote could add'''
+    return int(abs(price - price_renko) / brick_size) + 3
+
+
+def _quotes_kernel(renko, renko_ns, index, prices, dates, seconds, volumes,
+                   brick_size, renko_type, grid_price, brick_index, index_base):
+    '''Renko state machine over a batch of quotes
+
+    Same logic as RenkoFixBrickSize_Fast.new_quotes and _new_brick, written
+    over plain arrays to be compiled by numba. renko_ns is the int64 view of
+    renko, or empty without the nanoseconds columns, and the dates are given
+    both in nanoseconds and in seconds. Empty dates or volumes arrays mean
+    that they were not given. If
+    brick_index is not empty, it is filled with index_base plus the index
+    of the brick of each quote.
+
+    :return: tuple with the index of the last brick and the amount of quotes
+        processed. It stops before a quote that could overflow renko.
+    '''
+    has_dates = dates.shape[0] > 0
+    has_volumes = volumes.shape[0] > 0
+    has_index = brick_index.shape[0] > 0
+    has_ns = renko_ns.shape[0] > 0
+    capacity = renko.shape[0]
+
+    for position in range(prices.shape[0]):
+        price = prices[position]
+
+        if not (price >= renko[index, _COL_PRICE_MAX] or price <= renko[index, _COL_PRICE_MIN]):
+            # The quote is in the same renko brick
+            renko[index, _COL_PRICE_LAST] = price
+            renko[index, _COL_COUNT] += 1
+            if has_dates:
+                renko[index, _COL_DT_END] = seconds[position]
+                if has_ns:
+                    renko_ns[index, _COL_NS_END] = dates[position]
+            if has_volumes:
+                renko[index, _COL_VOLUME] += volumes[position]
+            if has_index:
+                brick_index[position] = index_base + index
+            continue
+
+        if index + _kernel_max_new_bricks(price, renko[index, _COL_PRICE_RENKO], brick_size) >= capacity:
+            return index, position
+
+        if has_dates:
+            renko[index, _COL_DT_END] = seconds[position]
+            if has_ns:
+                renko_ns[index, _COL_NS_END] = dates[position]
+
+        while True:
+            if price >= renko[index, _COL_PRICE_MAX] and (renko_type != 2 or price > renko[index, _COL_PRICE_MAX]):
+                direction = 1
+            elif price <= renko[index, _COL_PRICE_MIN] and (renko_type != 2 or price < renko[index, _COL_PRICE_MIN]):
+                direction = -1
+            else:
+                renko[index, _COL_COUNT] = 1
+                if has_volumes:
+                    renko[index, _COL_VOLUME] = volumes[position]
+                break
+
+            # A reversal happens when the last trend is the opposite one
+            if renko[index, _COL_TREND] * direction < 0:
+                if renko_type == 0:
+                    multiplier = 2
+                elif renko_type == 1:
+                    multiplier = 1
+                else:
+                    multiplier = 0
+                cons = 1.0
+            else:
+                multiplier = 1 if renko_type != 2 else 0
+                if direction > 0:
+                    cons = renko[index, _COL_CONS_UP] + 1
+                else:
+                    cons = renko[index, _COL_CONS_DOWN] + 1
+
+            if renko_type != 2:
+                if direction > 0:
+                    new_price_renko = renko[index, _COL_PRICE_RENKO] + multiplier * brick_size
+                    brick_upper_limit = new_price_renko + brick_size
+                    if renko_type == 0:
+                        brick_lower_limit = new_price_renko - 2 * brick_size
+                    else:
+                        brick_lower_limit = new_price_renko - 1 * brick_size
+                else:
+                    new_price_renko = renko[index, _COL_PRICE_RENKO] - multiplier * brick_size
+                    brick_lower_limit = new_price_renko - brick_size
+                    if renko_type == 0:
+                        brick_upper_limit = new_price_renko + 2 * brick_size
+                    else:
+                        brick_upper_limit = new_price_renko + 1 * brick_size
+            else:
+                brick_lower_limit = renko[index, _COL_PRICE_MIN] + direction * brick_size
+                brick_upper_limit = renko[index, _COL_PRICE_MAX] + direction * brick_size
+                if grid_price == 0:
+                    new_price_renko = (brick_lower_limit + brick_upper_limit) / 2
+                elif grid_price == 1:
+                    new_price_renko = brick_lower_limit
+                else:
+                    new_price_renko = brick_upper_limit
+
+            index += 1
+            renko[index, _COL_PRICE_LAST] = price
+            renko[index, _COL_PRICE_RENKO] = new_price_renko
+            renko[index, _COL_PRICE_MIN] = brick_lower_limit
+            renko[index, _COL_PRICE_MAX] = brick_upper_limit
+            if has_dates:
+                renko[index, _COL_DT_START] = seconds[position]
+                renko[index, _COL_DT_END] = seconds[position]
+            else:
+                renko[index, _COL_DT_START] = np.nan
+                renko[index, _COL_DT_END] = np.nan
+            if has_ns:
+                renko_ns[index, _COL_NS_START] = dates[position] if has_dates else _NAT
+                renko_ns[index, _COL_NS_END] = dates[position] if has_dates else _NAT
+            renko[index, _COL_TREND] = direction
+            renko[index, _COL_VOLUME] = 0
+            renko[index, _COL_COUNT] = 0
+            if direction > 0:
+                renko[index, _COL_CONS_UP] = cons
+                renko[index, _COL_CONS_DOWN] = 0
+            else:
+                renko[index, _COL_CONS_UP] = 0
+                renko[index, _COL_CONS_DOWN] = cons
+
+        if has_index:
+            brick_index[position] = index_base + index
+
+    return index, prices.shape[0]
+
+
+# Compiled kernel, set by _compile_kernels()
+_quotes_kernel_compiled = None
+
+
+def _compile_kernels():
+    '''Import numba and compile the kernels
+
+    If numba is installed but fails to import, like a numba built for
+    another NumPy version, the compiled path is disabled on every renko.
+
+    :return: the compiled kernel, or None if numba can not be imported
+    '''
+    global _HAS_NUMBA, _kernel_max_new_bricks, _quotes_kernel_compiled
+
+    if _quotes_kernel_compiled is None and _HAS_NUMBA:
+        try:
+            import numba
+        except ImportError:
+            _HAS_NUMBA = False
+            return None
+
+        _kernel_max_new_bricks = numba.njit(cache=True, nogil=True)(_kernel_max_new_bricks)
+        _quotes_kernel_compiled = numba.njit(cache=True, nogil=True)(_quotes_kernel)
+
+    return _quotes_kernel_compiled
@@ -0,0 +1,119 @@
+import os.path
+
+import numpy as np
+import pandas as pd
+
+'''
+Streaming of quote files to Renko.
+
+The quote files are read by chunks of a fixed amount of rows, and each chunk
+is given to the renko as numpy arrays. The renko keeps its state between
+chunks, so the memory used depends on the chunk size and not on the size of
+the file.
+'''
+
+FORMAT_CSV = 'csv'
+FORMAT_PARQUET = 'parquet'
+
+
+def _file_format(path):
+    '''Guess the format of the file from its extension'''
+    name = os.path.basename(path).lower()
+    for extension in ('.gz', '.bz2', '.zip', '.xz', '.zst'):
+        if name.endswith(extension):
+            name = name[:-len(extension)]
+
+    if name.endswith('.csv') or name.endswith('.txt'):
+        return FORMAT_CSV
+    if name.endswith('.parquet') or name.endswith('.pq'):
+        return FORMAT_PARQUET
+
+    raise ValueError('Unknown format of %s' % path)
+
+
+def _dates(values):
+    '''Dates of a chunk, as accepted by new_quotes()'''
+    if np.issubdtype(values.dtype, np.number):
+        return values
+
+    return pd.DatetimeIndex(pd.to_datetime(values, utc=True))
+
+
+def _column(batch, name):
+    '''Column of a pyarrow record batch, as a numpy array'''
+    return batch.column(name).to_numpy(zero_copy_only=False)
+
+
+def read_quotes(path, price_col='price', date_col=None, volume_col=None,
+                chunk_size=1000000, file_format=None, **kwargs):
+    '''Read a quotes file by chunks
+
+    :param path: path of a CSV or Parquet file
+    :type path: str
+    :param price_col: name of the price column
+    :type price_col: str
+    :param date_col: name of the date column. Numeric dates are epoch
+        seconds, other dates are parsed by pandas. Defaults to None, to not
+        read dates.
+    :type date_col: str
+    :param volume_col: name of the volume column. Defaults to None, to not
+        read volumes.
+    :type volume_col: str
+    :param chunk_size: amount of quotes of each chunk
+    :type chunk_size: int
+    :param file_format: FORMAT_CSV or FORMAT_PARQUET. Defaults to None, to
+        guess it from the file extension.
+    :type file_format: str
+    :param kwargs: other arguments of pandas.read_csv, like sep
+    :return: generator of (prices, dates, volumes) tuples of numpy arrays,
+        with None for the columns not read
+    '''
+    if file_format is None:
+        file_format = _file_format(path)
+
+    columns = [col for col in (price_col, date_col, volume_col) if col is not None]
+
+    if file_format == FORMAT_CSV:
+        # The default parser of pandas may change the last digit of a price
+        kwargs.setdefault('float_precision', 'round_trip')
+        chunks = pd.read_csv(path, usecols=columns, chunksize=chunk_size, **kwargs)
+        for chunk in chunks:
+            yield (
+                chunk[price_col].to_numpy(dtype=np.float64),
+                None if date_col is None else _dates(chunk[date_col].to_numpy()),
+                None if volume_col is None else chunk[volume_col].to_numpy(dtype=np.float64),
+            )
+    elif file_format == FORMAT_PARQUET:
+        try:
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError('pyarrow is needed to read Parquet files')
+
+        parquet = pyarrow.parquet.ParquetFile(path)
+        for batch in parquet.iter_batches(batch_size=chunk_size, columns=columns):
+            yield (
+                _column(batch, price_col).astype(np.float64, copy=False),
+                None if date_col is None else _dates(_column(batch, date_col)),
+                None if volume_col is None else _column(batch, volume_col).astype(np.float64, copy=False),
+            )
+    else:
+        raise ValueError('Format %s is not supported' % file_format)
+
+
+def feed(renko, path, price_col='price', date_col=None, volume_col=None,
+         chunk_size=1000000, file_format=None, **kwargs):
+    '''Give all the quotes of a file to a renko, by chunks
+
+    :param renko: renko that receives the quotes, like a
+        RenkoFixBrickSize_Fast
+    :param path: path of a CSV or Parquet file
+    :type path: str
+    :return: the renko
+
+    The other parameters are the ones of read_quotes().
+    '''
+    for (prices, dates, volumes) in read_quotes(path, price_col, date_col, volume_col,
+                                                chunk_size, file_format, **kwargs):
+        renko.new_quotes(prices, dates=dates, volumes=volumes)
+
+    return renko
@@ -0,0 +1,169 @@
+import sys
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
+from multiprocessing import resource_tracker
+
+import numpy as np
+
+from renko_fast import Renko
+from renko_fast import sweep
+
+'''
+Brick size optimizer over many instruments.
+
+The brick size that maximizes RenkoFixBrickSize_Fast.performance() score is
+searched for every instrument on a pool of processes. The prices are copied
+once to a shared memory block that the workers read in place, so only the
+brick sizes and the performance rows travel between processes.
+'''
+
+
+# Shared prices, attached once per worker process
+_worker_prices = None
+_worker_shm = None
+
+
+def _skip_register(name, rtype):
+    '''resource_tracker.register() replacement to attach the shared prices'''
+    pass
+
+
+def _attach(shm_name, size):
+    '''Worker initializer: map the shared prices'''
+    global _worker_prices, _worker_shm
+
+    # The block belongs to the parent process, that unlinks it, so it is not
+    # registered on the resource tracker, that workers share with the parent
+    if sys.version_info >= (3, 13):
+        _worker_shm = shared_memory.SharedMemory(name=shm_name, track=False)
+    else:
+        register = resource_tracker.register
+        resource_tracker.register = _skip_register
+        try:
+            _worker_shm = shared_memory.SharedMemory(name=shm_name)
+        finally:
+            resource_tracker.register = register
+    _worker_prices = np.ndarray((size,), dtype=np.float64, buffer=_worker_shm.buf)
+
+
+def _evaluate(start, stop, brick_sizes, renko_type, kwargs):
+    '''Worker job: performance of the brick sizes over a slice of prices'''
+    return sweep(_worker_prices[start:stop], brick_sizes, (renko_type,), **kwargs)
+
+
+class RenkoOptimizer():
+    '''Search the best brick size of many instruments on a process pool'''
+
+    def __init__(self, brick_sizes, renko_types=(Renko.TypeRenko,), processes=None,
+                 refinements=2, refine_points=5, **kwargs):
+        '''Optimizer Constructor
+
+        :param brick_sizes: initial grid of brick sizes to evaluate. The
+            same grid is used for every instrument.
+        :type brick_sizes: list of float
+        :param renko_types: renko types to evaluate
+        :type renko_types: list of str
+        :param processes: size of the process pool. Defaults to the amount
+            of CPUs.
+        :type processes: int
+        :param refinements: amount of coarse to fine rounds. On each round,
+            the space between the neighbours of the best brick size is
+            evaluated with refine_points brick sizes.
+        :type refinements: int
+        :param refine_points: brick sizes evaluated on each refinement
+        :type refine_points: int
+        :param kwargs: other arguments of RenkoFixBrickSize_Fast, like
+            grid_price
+        '''
+        self.brick_sizes = np.unique(np.asarray(brick_sizes, dtype=np.float64))
+        self.renko_types = tuple(renko_types)
+        self.processes = processes
+        self.refinements = refinements
+        self.refine_points = refine_points
+        self.kwargs = kwargs
+
+    def optimize(self, instruments):
+        '''Search the best brick size and renko type of each instrument
+
+        :param instruments: prices of each instrument, by symbol
+        :type instruments: dict of list of float or numpy.ndarray
+        :return: numpy structured array with a row per instrument, with the
+            symbol, brick_size, renko_type and the performance() keys of the
+            best score
+        '''
+        symbols = list(instruments)
+        prices = [np.asarray(instruments[symbol], dtype=np.float64) for symbol in symbols]
+        bounds = np.cumsum([0] + [p.shape[0] for p in prices])
+        size = int(bounds[-1])
+
+        shm = shared_memory.SharedMemory(create=True, size=max(size, 1) * 8)
+        try:
+            shared = np.ndarray((size,), dtype=np.float64, buffer=shm.buf)
+            for (index, p) in enumerate(prices):
+                shared[bounds[index]:bounds[index + 1]] = p
+            del shared
+
+            with ProcessPoolExecutor(max_workers=self.processes, initializer=_attach,
+                                     initargs=(shm.name, size)) as executor:
+                best = self._search(executor, bounds, len(symbols))
+        finally:
+            shm.close()
+            shm.unlink()
+
+        dtype = [('symbol', object)] + best[0].dtype.descr if best else [('symbol', object)]
+        ret = np.zeros(len(symbols), dtype=dtype)
+        for (index, symbol) in enumerate(symbols):
+            ret[index]['symbol'] = symbol
+            for name in best[index].dtype.names:
+                ret[index][name] = best[index][name]
+
+        return ret
+
+    def _search(self, executor, bounds, instruments):
+        '''Coarse to fine search of every instrument and renko type
+
+        :return: list with the best performance row of each instrument
+        '''
+        # Brick sizes to evaluate of each (instrument, renko type) job
+        jobs = {
+            (index, renko_type): self.brick_sizes
+            for index in range(instruments)
+            for renko_type in self.renko_types
+        }
+        best = {}
+
+        for refinement in range(self.refinements + 1):
+            futures = {
+                job: executor.submit(_evaluate, int(bounds[job[0]]), int(bounds[job[0] + 1]),
+                                     brick_sizes, job[1], self.kwargs)
+                for (job, brick_sizes) in jobs.items()
+            }
+
+            next_jobs = {}
+            for (job, future) in futures.items():
+                table = future.result()
+                position = int(np.argmax(table['score']))
+                if job not in best or table[position]['score'] > best[job]['score']:
+                    best[job] = table[position]
+
+                next_jobs[job] = self._refine(jobs[job], position)
+
+            jobs = next_jobs
+
+        # Best renko type of each instrument
+        ret = []
+        for index in range(instruments):
+            rows = [best[(index, renko_type)] for renko_type in self.renko_types]
+            ret.append(max(rows, key=lambda row: row['score']))
+
+        return ret
+
+    def _refine(self, brick_sizes, position):
+        '''Finer grid of brick sizes between the neighbours of position'''
+        lower = brick_sizes[max(position - 1, 0)]
+        upper = brick_sizes[min(position + 1, brick_sizes.shape[0] - 1)]
+
+        return np.unique(np.concatenate((
+            np.linspace(lower, upper, self.refine_points),
+            brick_sizes[position:position + 1],
+        )))
@@ -28,7 +28,13 @@ setup(
     author_email="gabo@moncarz.com.ar",
     zip_safe=False,
     packages=['tests'],
-    py_modules=['renko', 'renko_fast'],
+    py_modules=['renko', 'renko_fast', 'renko_optimize', 'renko_book',
+                'renko_io', 'renko_async', 'renko_env'],
+    extras_require={
+        'numba': ['numba'],
+        'parquet': ['pyarrow'],
+        'arrow': ['pyarrow'],
+    },
     platforms=["POSIX"],
     test_suite="tests",
 )
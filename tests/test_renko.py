@@ -138,3 +138,19 @@ class RenkoFixBrickSizeTest(unittest.TestCase):
 
         self.assertListEqual(subject.renko.price_renko.values.tolist(), self.expected_renko_prices)
         self.assertListEqual(subject.renko.trend.values.tolist(), self.expected_trend)
+
+    def test_renko_dataframe(self):
+        subject = RenkoFixBrickSize(10, 'test')
+        subject.new_quotes(self.data.price[:10].tolist(), dates=self.data.date[:10].tolist())
+        renko = subject.renko
+
+        self.assertListEqual(renko.columns.tolist(), RenkoFixBrickSize.columns)
+        self.assertEqual(str(renko.dt_start.dtype), 'datetime64[ns, UTC]')
+        self.assertEqual(renko.trend.dtype, 'int64')
+        self.assertEqual(renko['count'].dtype, 'int64')
+        self.assertEqual(renko.dt_end.iloc[-1], pd.Timestamp(10, unit='s', tz='UTC'))
+
+        # Built once, until new quotes
+        self.assertIs(subject.renko, renko)
+        subject.new_quotes(self.data.price[10:].tolist(), dates=self.data.date[10:].tolist())
+        self.assertListEqual(subject.renko.price_renko.values.tolist(), self.expected_renko_prices)
@@ -0,0 +1,81 @@
+import asyncio
+import unittest
+import numpy as np
+
+from renko_fast import RenkoFixBrickSize_Fast
+from renko_async import RenkoStream
+
+
+async def fake_feed(ticks, burst=100, delay=0):
+    '''In process feed that yields the ticks by bursts'''
+    for (position, tick) in enumerate(ticks):
+        if position % burst == 0:
+            await asyncio.sleep(delay)
+        yield tick
+
+
+class RenkoStreamTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        self.prices = 100 + np.cumsum(rnd.normal(0, 1, 5000))
+        self.dates = np.arange(5000) + 1500000000
+        self.volumes = rnd.randint(1, 100, 5000).astype(float)
+
+        self.expected = RenkoFixBrickSize_Fast(2, 'expected')
+        self.expected.new_quotes(self.prices, dates=self.dates, volumes=self.volumes)
+
+    def _run(self, stream, ticks):
+        async def main():
+            bricks = []
+
+            async def consume():
+                async for (seq, brick) in stream.bricks():
+                    bricks.append((seq, brick))
+
+            consumer = asyncio.ensure_future(consume())
+            await stream.run(ticks)
+            await consumer
+            return bricks
+
+        return asyncio.run(main())
+
+    def test_stream(self):
+        stream = RenkoStream(RenkoFixBrickSize_Fast(2, 'test'), batch_size=300)
+        ticks = fake_feed(zip(self.prices.tolist(), self.dates.tolist(), self.volumes.tolist()))
+        bricks = self._run(stream, ticks)
+
+        expected = self.expected.get_renko()
+        np.testing.assert_array_equal(stream.renko.get_renko(), expected)
+
+        # Every brick but the last one, that is not completed
+        self.assertListEqual([seq for (seq, _) in bricks], list(range(expected.shape[0] - 1)))
+        np.testing.assert_array_equal(np.array([brick for (_, brick) in bricks]), expected[:-1])
+
+    def test_batch_window(self):
+        # Slow bursts of prices only: the batches are closed by time
+        stream = RenkoStream(RenkoFixBrickSize_Fast(2, 'test'), batch_size=10000, batch_window=.001)
+        batches = []
+        process = stream._process
+
+        def record(batch):
+            batches.append(len(batch))
+            return process(batch)
+        stream._process = record
+
+        self._run(stream, fake_feed(self.prices[:1000].tolist(), burst=250, delay=.02))
+
+        self.assertGreater(len(batches), 1)
+        self.assertLessEqual(max(batches), 251)
+        expected = RenkoFixBrickSize_Fast(2, 'expected')
+        expected.new_quotes(self.prices[:1000])
+        np.testing.assert_array_equal(stream.renko.get_renko(), expected.get_renko())
+
+    def test_feed_error(self):
+        async def broken_feed():
+            yield 100.0
+            raise RuntimeError('disconnected')
+
+        stream = RenkoStream(RenkoFixBrickSize_Fast(2, 'test'))
+        with self.assertRaises(RuntimeError):
+            self._run(stream, broken_feed())
+        self.assertEqual(stream.renko.get_renko().shape[0], 1)
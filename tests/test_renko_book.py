@@ -0,0 +1,103 @@
+import threading
+import unittest
+import numpy as np
+
+from renko_fast import RenkoFixBrickSize_Fast
+from renko_book import RenkoBook
+from renko_book import ShardedRenkoBook
+
+
+class RenkoBookTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        size = 20000
+        self.symbol_ids = rnd.randint(0, 50, size)
+        self.prices = 100 + rnd.normal(0, 1, size).cumsum() + self.symbol_ids
+        self.volumes = rnd.randint(1, 100, size).astype(float)
+        self.dates = np.arange(size) + 1500000000
+
+    def test_interleaved_quotes(self):
+        book = RenkoBook(2, max_bricks=None)
+        for start in range(0, self.prices.shape[0], 3000):
+            stop = start + 3000
+            book.new_quotes(self.symbol_ids[start:stop], self.prices[start:stop],
+                            dates=self.dates[start:stop], volumes=self.volumes[start:stop])
+
+        self.assertEqual(len(book), 50)
+        for symbol_id in range(50):
+            mask = self.symbol_ids == symbol_id
+            subject = RenkoFixBrickSize_Fast(2, 'test')
+            subject.new_quotes(self.prices[mask], dates=self.dates[mask], volumes=self.volumes[mask])
+
+            np.testing.assert_array_equal(book.get_renko(symbol_id), subject.get_renko())
+            self.assertDictEqual(book.performance(symbol_id), subject.performance())
+
+    def test_brick_size_by_symbol(self):
+        brick_sizes = np.linspace(1, 5, 50)
+        book = RenkoBook(brick_sizes)
+        book.new_quotes(self.symbol_ids, self.prices)
+
+        self.assertEqual(book[7].brick_size, brick_sizes[7])
+        self.assertIn(7, book)
+        self.assertNotIn(50, book)
+        with self.assertRaises(KeyError):
+            book.get_renko(50)
+
+
+class ShardedRenkoBookTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        size = 20000
+        self.symbol_ids = rnd.randint(0, 50, size)
+        self.prices = 100 + rnd.normal(0, 1, size).cumsum() + self.symbol_ids
+        self.dates = np.arange(size) + 1500000000
+
+    def test_many_feed_threads(self):
+        expected = RenkoBook(2)
+        expected.new_quotes(self.symbol_ids, self.prices, dates=self.dates)
+
+        # A feed thread per group of symbols, with a reader taking snapshots
+        snapshots = []
+        stop = threading.Event()
+
+        def feed(book, group):
+            mask = self.symbol_ids % 4 == group
+            (symbol_ids, prices, dates) = (self.symbol_ids[mask], self.prices[mask], self.dates[mask])
+            for start in range(0, symbol_ids.shape[0], 500):
+                book.new_quotes(symbol_ids[start:start + 500], prices[start:start + 500],
+                                dates=dates[start:start + 500])
+
+        def read(book):
+            while not stop.is_set():
+                if 8 in book:
+                    snapshots.append(book.get_renko(8))
+
+        with ShardedRenkoBook(2, shards=3) as book:
+            reader = threading.Thread(target=read, args=(book,))
+            reader.start()
+            feeds = [threading.Thread(target=feed, args=(book, group)) for group in range(4)]
+            for thread in feeds:
+                thread.start()
+            for thread in feeds:
+                thread.join()
+            book.flush()
+            stop.set()
+            reader.join()
+
+            self.assertEqual(len(book), 50)
+            for symbol_id in range(50):
+                np.testing.assert_array_equal(book.get_renko(symbol_id), expected.get_renko(symbol_id))
+                self.assertDictEqual(book.performance(symbol_id), expected.performance(symbol_id))
+
+        # Every snapshot is a consistent state: the finished bricks do not
+        # change afterwards
+        final = expected.get_renko(8)
+        for snapshot in snapshots:
+            np.testing.assert_array_equal(snapshot[:-1], final[:snapshot.shape[0] - 1])
+
+    def test_worker_error(self):
+        book = ShardedRenkoBook(2, shards=2, renko_type='unknown')
+        book.new_quotes([1], [100.0])
+        with self.assertRaises(Exception):
+            book.flush()
+        book.close()
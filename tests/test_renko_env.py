@@ -0,0 +1,64 @@
+import unittest
+import numpy as np
+
+from renko_fast import RenkoFixBrickSize_Fast
+from renko_env import RenkoVecEnv
+
+
+class RenkoVecEnvTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        self.prices = [100 + rnd.normal(0, 1, 3000).cumsum() for _ in range(3)]
+
+    def test_observations(self):
+        env = RenkoVecEnv(self.prices, 1, window=8, ticks_per_step=10, warmup_ticks=100, random_start=False)
+        (observations, info) = env.reset()
+        self.assertEqual(observations.shape, (3, 8, 3))
+        self.assertEqual(observations.dtype, np.float32)
+
+        for _ in range(20):
+            (observations, rewards, terminated, truncated, info) = env.step(np.array([1, -1, 0]))
+
+        for env_id in range(3):
+            subject = RenkoFixBrickSize_Fast(1, 'subject')
+            subject.new_quotes(self.prices[env_id][:300])
+            expected = subject.get_renko()[-8:][:, env.columns]
+            np.testing.assert_array_equal(observations[env_id], expected.astype(np.float32))
+
+        # The rewards are the price change of the last step in bricks
+        change = self.prices[0][299] - self.prices[0][289]
+        self.assertAlmostEqual(rewards[0], change)
+        self.assertAlmostEqual(rewards[1], -(self.prices[1][299] - self.prices[1][289]))
+        self.assertEqual(rewards[2], 0)
+        self.assertFalse(terminated.any() or truncated.any())
+
+    def test_padding(self):
+        env = RenkoVecEnv(self.prices[0], 1000, num_envs=2, window=4, seed=0)
+        (observations, info) = env.reset()
+        np.testing.assert_array_equal(observations[:, :3], 0)
+        self.assertNotEqual(observations[0, 3, 0], 0)
+
+    def test_episode_end(self):
+        env = RenkoVecEnv(self.prices, 1, num_envs=4, window=8, ticks_per_step=100,
+                          warmup_ticks=100, episode_steps=5, seed=0)
+        env.reset()
+        renkos = list(env.renkos)
+        observations_buffer = env.observations
+
+        ends = 0
+        for _ in range(100):
+            (observations, rewards, terminated, truncated, info) = env.step(np.ones(4))
+            ends += terminated.sum() + truncated.sum()
+            for env_id in np.flatnonzero(terminated | truncated):
+                self.assertTrue(info['final_observation'][env_id].any())
+                # The new episode starts with the warmup quotes
+                self.assertLessEqual(env.renkos[env_id].sequence(), 100)
+
+        self.assertGreater(ends, 0)
+        self.assertTrue(all(a is b for (a, b) in zip(renkos, env.renkos)))
+        self.assertIs(observations, observations_buffer)
+
+    def test_seed(self):
+        first = RenkoVecEnv(self.prices, 1, window=8, seed=1).reset()[0].copy()
+        second = RenkoVecEnv(self.prices, 1, window=8, seed=1).reset()[0]
+        np.testing.assert_array_equal(first, second)
@@ -1,9 +1,24 @@
+import os
+import subprocess
+import sys
+import tempfile
 import unittest
+import unittest.mock
+import numpy as np
 import pandas as pd
 
 from renko_fast import RenkoFixBrickSize_Fast
+from renko_fast import RenkoAdaptiveBrickSize_Fast
 from renko_fast import Renko
 from renko_fast import GridPrice
+from renko_fast import sweep
+from renko_fast import aggregate_bricks
+import renko_fast
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
 
 
 class RenkoFixBrickSize_FastTest(unittest.TestCase):
@@ -370,3 +385,882 @@ class RenkoFixBrickSize_FastTest(unittest.TestCase):
             self.assertEqual(subject_avg.get_renko()[:, subject_avg.col_trend][-1], expected_grid_trend[index])
             self.assertEqual(subject_min.get_renko()[:, subject_min.col_trend][-1], expected_grid_trend[index])
             self.assertEqual(subject_max.get_renko()[:, subject_max.col_trend][-1], expected_grid_trend[index])
+
+    def _random_walk(self, size=5000, seed=0):
+        rnd = np.random.RandomState(seed)
+        prices = 100 + np.cumsum(rnd.normal(0, 1, size))
+        # Add some gaps that cross several bricks at once
+        gaps = rnd.randint(0, size, 20)
+        prices[gaps] += rnd.choice([-1, 1], 20) * rnd.uniform(20, 60, 20)
+        volumes = rnd.randint(1, 1000, size).astype(float)
+        dates = np.arange(size) + 1500000000
+        return prices, dates, volumes
+
+    def _assert_batch_equals_tick_by_tick(self, **kwargs):
+        prices, dates, volumes = self._random_walk()
+
+        batch = RenkoFixBrickSize_Fast(5, 'batch', **kwargs)
+        batch.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        tick = RenkoFixBrickSize_Fast(5, 'tick', **kwargs)
+        for (price, date, volume) in zip(prices, dates.tolist(), volumes):
+            tick.new_quotes([price], dates=[date], volumes=[volume])
+
+        np.testing.assert_array_equal(batch.get_renko(), tick.get_renko())
+        self.assertDictEqual(batch.performance(), tick.performance())
+
+    def test_batch_equals_tick_by_tick_renko(self):
+        self._assert_batch_equals_tick_by_tick(renko_type=Renko.TypeRenko)
+
+    def test_batch_equals_tick_by_tick_symetric(self):
+        self._assert_batch_equals_tick_by_tick(renko_type=Renko.TypeRenkoSymetric)
+
+    def test_batch_equals_tick_by_tick_grid(self):
+        for grid_price in GridPrice:
+            self._assert_batch_equals_tick_by_tick(renko_type=Renko.TypeGrid, grid_price=grid_price)
+
+    def test_batch_in_several_calls(self):
+        prices, dates, volumes = self._random_walk()
+
+        whole = RenkoFixBrickSize_Fast(5, 'whole')
+        whole.new_quotes(prices, volumes=volumes)
+
+        split = RenkoFixBrickSize_Fast(5, 'split')
+        for start in range(0, prices.shape[0], 777):
+            split.new_quotes(prices[start:start + 777], volumes=volumes[start:start + 777])
+
+        np.testing.assert_array_equal(whole.get_renko(), split.get_renko())
+
+    def _assert_kernel_equals_batch(self, kernel, brick_size=5, gaps=False, **kwargs):
+        prices, dates, volumes = self._random_walk()
+        if gaps:
+            # Most quotes add a gap of hundreds of bricks
+            prices = 100 + (prices - 100) * 20
+        if brick_size < 1:
+            # Dense bricks, with quotes on their boundaries
+            prices = np.round(prices / brick_size) * brick_size
+
+        batch = RenkoFixBrickSize_Fast(brick_size, 'batch', compiled=False, **kwargs)
+        batch_index = np.zeros(prices.shape[0], dtype=np.int64)
+        batch.new_quotes(prices, dates=dates.tolist(), volumes=volumes, brick_index=batch_index)
+
+        subject = RenkoFixBrickSize_Fast(brick_size, 'kernel', initial_size=10, compiled=False, **kwargs)
+        subject_index = np.zeros(prices.shape[0], dtype=np.int64)
+        subject.new_quotes(prices[:1], dates=dates[:1].tolist(), volumes=volumes[:1])
+        with unittest.mock.patch.object(renko_fast, '_quotes_kernel_compiled', kernel):
+            subject._new_quotes_compiled(prices[1:], renko_fast.dates_to_ns(dates[1:]), volumes[1:],
+                                         subject_index[1:])
+
+        np.testing.assert_array_equal(batch.get_renko(), subject.get_renko())
+        np.testing.assert_array_equal(batch_index[1:], subject_index[1:])
+
+        if gaps:
+            # The gaps are written through the small float matrix
+            columns = RenkoFixBrickSize_Fast(brick_size, 'columns', compiled=False,
+                                             storage=RenkoFixBrickSize_Fast.STORAGE_COLUMNS, **kwargs)
+            columns.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+            np.testing.assert_array_equal(batch.get_renko(), columns.get_renko())
+
+    def test_python_kernel_equals_batch(self):
+        for renko_type in (Renko.TypeRenko, Renko.TypeRenkoSymetric):
+            self._assert_kernel_equals_batch(renko_fast._quotes_kernel, renko_type=renko_type)
+        for grid_price in GridPrice:
+            self._assert_kernel_equals_batch(renko_fast._quotes_kernel, renko_type=Renko.TypeGrid,
+                                             grid_price=grid_price)
+
+    def test_python_kernel_equals_batch_dense(self):
+        for renko_type in (Renko.TypeRenko, Renko.TypeRenkoSymetric):
+            self._assert_kernel_equals_batch(renko_fast._quotes_kernel, brick_size=.5,
+                                             renko_type=renko_type)
+        for grid_price in GridPrice:
+            self._assert_kernel_equals_batch(renko_fast._quotes_kernel, brick_size=.5,
+                                             renko_type=Renko.TypeGrid, grid_price=grid_price)
+
+    def test_python_kernel_equals_batch_gaps(self):
+        for renko_type in (Renko.TypeRenko, Renko.TypeRenkoSymetric):
+            self._assert_kernel_equals_batch(renko_fast._quotes_kernel, brick_size=.5, gaps=True,
+                                             renko_type=renko_type)
+        for grid_price in GridPrice:
+            self._assert_kernel_equals_batch(renko_fast._quotes_kernel, brick_size=.5, gaps=True,
+                                             renko_type=Renko.TypeGrid, grid_price=grid_price)
+
+    @unittest.skipIf(not renko_fast._HAS_NUMBA, 'numba is not installed')
+    def test_compiled_kernel_equals_batch(self):
+        kernel = renko_fast._compile_kernels()
+        for renko_type in (Renko.TypeRenko, Renko.TypeRenkoSymetric):
+            self._assert_kernel_equals_batch(kernel, renko_type=renko_type)
+        for grid_price in GridPrice:
+            self._assert_kernel_equals_batch(kernel, renko_type=Renko.TypeGrid,
+                                             grid_price=grid_price)
+
+    @unittest.skipIf(not renko_fast._HAS_NUMBA, 'numba is not installed')
+    def test_compiled_by_default(self):
+        prices, dates, volumes = self._random_walk()
+
+        compiled = RenkoFixBrickSize_Fast(5, 'compiled')
+        self.assertTrue(compiled.compiled)
+        compiled.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        python = RenkoFixBrickSize_Fast(5, 'python', compiled=False)
+        python.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        np.testing.assert_array_equal(compiled.get_renko(), python.get_renko())
+
+    def test_storage_columns(self):
+        prices, dates, volumes = self._random_walk()
+
+        matrix = RenkoFixBrickSize_Fast(5, 'matrix')
+        matrix.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        # A small float matrix, to spill the bricks many times
+        columns = RenkoFixBrickSize_Fast(5, 'columns', initial_size=10,
+                                         storage=RenkoFixBrickSize_Fast.STORAGE_COLUMNS)
+        for start in range(0, prices.shape[0], 500):
+            columns.new_quotes(prices[start:start + 500], dates=dates[start:start + 500].tolist(),
+                               volumes=volumes[start:start + 500])
+
+        np.testing.assert_array_equal(matrix.get_renko(), columns.get_renko())
+        self.assertDictEqual(matrix.performance(), columns.performance())
+
+        typed = columns.get_renko(columns.AS_COLUMNS)
+        self.assertEqual(typed['trend'].dtype, np.int8)
+        self.assertEqual(typed['count'].dtype, np.int32)
+        self.assertEqual(typed['dt_start'].dtype, np.int64)
+        self.assertEqual(typed['dt_start'][0], dates[0] * 10**9)
+        np.testing.assert_array_equal(typed['price_renko'],
+                                      matrix.get_renko()[:, matrix.col_price_renko])
+
+    def test_dates_to_ns(self):
+        expected = [1500000000 * 10**9, 1500000001 * 10**9, RenkoFixBrickSize_Fast._NAT]
+        index = pd.DatetimeIndex(['2017-07-14 02:40:00', '2017-07-14 02:40:01', None], tz='UTC')
+
+        for dates in (
+            [1500000000, 1500000001, None],
+            np.array([1500000000, 1500000001, np.nan]),
+            index,
+            index.tz_convert('America/Argentina/Buenos_Aires'),
+            pd.Series(index),
+            index.values,
+            list(index),
+        ):
+            result = renko_fast.dates_to_ns(dates)
+            self.assertEqual(result.dtype, np.int64)
+            self.assertListEqual(result.tolist(), expected)
+
+        self.assertListEqual(renko_fast.dates_to_ns(np.array([1500000000, 1500000001])).tolist(),
+                             expected[:2])
+
+    def test_dates_nanoseconds(self):
+        dates = pd.DatetimeIndex(['2020-01-01 00:00:00.000000001', '2020-01-01 00:00:00.000000002',
+                                  '2020-01-01 00:00:00.000000003'], tz='UTC')
+        ns = dates.values.astype('datetime64[ns]').view(np.int64)
+
+        for kwargs in ({'ns_dates': True}, {'storage': RenkoFixBrickSize_Fast.STORAGE_COLUMNS}):
+            for compiled in (False, True):
+                subject = RenkoFixBrickSize_Fast(10, 'test', compiled=compiled, **kwargs)
+                subject.new_quotes([100, 105, 115], dates=dates)
+
+                columns = subject.get_renko(subject.AS_COLUMNS)
+                self.assertListEqual(columns['dt_start'].tolist(), [ns[0], ns[2]])
+                self.assertListEqual(columns['dt_end'].tolist(), [ns[2], ns[2]])
+                np.testing.assert_array_equal(subject.get_renko()[:, subject.col_dt_start], ns[[0, 2]] / 1e9)
+
+        # By default the matrix has no nanoseconds columns, and the dates
+        # come from the float seconds
+        for compiled in (False, True):
+            subject = RenkoFixBrickSize_Fast(10, 'test', compiled=compiled)
+            subject.new_quotes([100, 105, 115], dates=dates)
+
+            self.assertEqual(subject._renko.shape[1], len(subject.as_dataframe_colnames))
+            columns = subject.get_renko(subject.AS_COLUMNS)
+            seconds = subject.get_renko()[:, subject.col_dt_start]
+            self.assertListEqual(columns['dt_start'].tolist(), renko_fast.dates_to_ns(seconds).tolist())
+            self.assertLess(np.abs(columns['dt_start'] - ns[[0, 2]]).max(), 1000)
+
+    def test_ns_dates(self):
+        prices, dates, volumes = self._random_walk()
+
+        for (kwargs, row_bytes) in (({}, 88), ({'ns_dates': True}, 104), ({'max_bricks': 50}, 88),
+                                    ({'max_bricks': 50, 'ns_dates': True}, 104)):
+            subject = RenkoFixBrickSize_Fast(5, 'test', **kwargs)
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+            self.assertEqual(subject._renko.shape[1] * subject._renko.itemsize, row_bytes)
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'renko.bin')
+                subject.save(path)
+                restored = RenkoFixBrickSize_Fast.load(path)
+                self.assertEqual(restored.ns_dates, subject.ns_dates)
+                restored.new_quotes(prices[:100], dates=dates[:100])
+                subject.new_quotes(prices[:100], dates=dates[:100])
+                np.testing.assert_array_equal(restored.get_renko(), subject.get_renko())
+                columns = subject.get_renko(subject.AS_COLUMNS)
+                for (name, column) in restored.get_renko(subject.AS_COLUMNS).items():
+                    np.testing.assert_array_equal(column, columns[name])
+                del restored
+
+    def test_storage_columns_without_dates(self):
+        subject = RenkoFixBrickSize_Fast(10, 'test', storage=RenkoFixBrickSize_Fast.STORAGE_COLUMNS,
+                                         price_dtype=np.float32)
+        subject.new_quotes(self.data.price.tolist())
+
+        self.assertListEqual(subject.get_renko()[:, subject.col_price_renko].tolist(), self.expected_renko_prices)
+        self.assertListEqual(subject.get_renko()[:, subject.col_trend].tolist(), self.expected_trend)
+        self.assertTrue(np.isnan(subject.get_renko()[:, subject.col_dt_start]).all())
+        self.assertEqual(subject.get_renko(subject.AS_COLUMNS)['price_renko'].dtype, np.float32)
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_arrow_export(self):
+        prices, dates, volumes = self._random_walk()
+
+        for storage in (RenkoFixBrickSize_Fast.STORAGE_MATRIX, RenkoFixBrickSize_Fast.STORAGE_COLUMNS):
+            subject = RenkoFixBrickSize_Fast(5, 'test', storage=storage)
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+            subject.new_quotes(prices[:10])
+
+            table = subject.get_renko(subject.AS_ARROW)
+            columns = subject.get_renko(subject.AS_COLUMNS)
+            self.assertListEqual(table.column_names, subject.as_dataframe_colnames)
+            self.assertEqual(table.schema.field('dt_start').type, pyarrow.timestamp('ns', tz='UTC'))
+            self.assertEqual(table.schema.field('trend').type, pyarrow.int8())
+            self.assertEqual(table.schema.field('count').type, pyarrow.int32())
+            for name in subject.as_dataframe_colnames:
+                if name in ('dt_start', 'dt_end'):
+                    continue
+                np.testing.assert_array_equal(table.column(name).to_numpy(), columns[name])
+
+            # The quotes without dates have null dates
+            dt_start = table.column('dt_start')
+            self.assertEqual(dt_start.null_count, (columns['dt_start'] == subject._NAT).sum())
+            self.assertEqual(dt_start[0].value, dates[0] * 10**9)
+
+            frame = subject.get_renko(subject.AS_ARROW_DATAFRAME)
+            self.assertIsInstance(frame.dtypes['count'], pd.ArrowDtype)
+            self.assertListEqual(frame['trend'].tolist(), columns['trend'].tolist())
+
+        # The typed columns are shared, not copied
+        address = table.column('count').chunk(0).buffers()[1].address
+        self.assertEqual(address, columns['count'].ctypes.data)
+
+    def test_reserve_and_shrink_to_fit(self):
+        subject = RenkoFixBrickSize_Fast(10, 'test', initial_size=1)
+        subject.reserve(100)
+        self.assertEqual(subject._renko.shape[0], 100)
+
+        subject.new_quotes(self.data.price.tolist())
+        self.assertEqual(subject._renko.shape[0], 100)
+
+        subject.shrink_to_fit()
+        self.assertEqual(subject._renko.shape[0], 24)
+        self.assertListEqual(subject.get_renko()[:, subject.col_price_renko].tolist(), self.expected_renko_prices)
+
+        # Keeps growing after shrinking
+        subject.new_quotes([200])
+        self.assertEqual(subject.get_renko()[-1, subject.col_price_renko], 195)
+
+    def test_big_batches_grow_geometrically(self):
+        prices = 100 + np.cumsum(np.random.RandomState(0).normal(0, 1, 300000))
+        for (storage, method) in ((RenkoFixBrickSize_Fast.STORAGE_MATRIX, '_resize'),
+                                  (RenkoFixBrickSize_Fast.STORAGE_COLUMNS, '_resize_columns')):
+            for chunk in (1000, 1500):
+                subject = RenkoFixBrickSize_Fast(.5, 'subject', initial_size=100, storage=storage,
+                                                 compiled=False)
+                with unittest.mock.patch.object(subject, method, wraps=getattr(subject, method)) as resize:
+                    for start in range(0, prices.shape[0], chunk):
+                        subject.new_quotes(prices[start:start + chunk])
+
+                # O(log n) reallocations, growing by increment_pct
+                bricks = subject.sequence() + 1
+                self.assertLessEqual(resize.call_count, int(np.log(bricks / 100) / np.log(1.5)) + 2)
+
+    def test_presized_batches_are_not_estimated(self):
+        prices = 100 + np.cumsum(np.random.RandomState(0).normal(0, 1, 10000))
+        for storage in (RenkoFixBrickSize_Fast.STORAGE_MATRIX, RenkoFixBrickSize_Fast.STORAGE_COLUMNS):
+            subject = RenkoFixBrickSize_Fast(.5, 'subject', initial_size=20000, storage=storage)
+            with unittest.mock.patch.object(subject, 'estimate_bricks',
+                                            wraps=subject.estimate_bricks) as estimate:
+                subject.new_quotes(prices[:5000])
+                subject.new_quotes(prices[5000:])
+            self.assertEqual(estimate.call_count, 0)
+
+            # Without room for a whole batch the bricks are estimated
+            subject = RenkoFixBrickSize_Fast(.5, 'subject', initial_size=100, storage=storage)
+            with unittest.mock.patch.object(subject, 'estimate_bricks',
+                                            wraps=subject.estimate_bricks) as estimate:
+                subject.new_quotes(prices)
+            self.assertEqual(estimate.call_count, 1)
+
+    def test_estimate_bricks(self):
+        prices, _, _ = self._random_walk(size=100000)
+
+        for renko_type in (Renko.TypeRenko, Renko.TypeRenkoSymetric, Renko.TypeGrid):
+            for brick_size in (0.5, 2, 10):
+                subject = RenkoFixBrickSize_Fast(brick_size, 'test', initial_size=1, renko_type=renko_type)
+                estimate = subject.estimate_bricks(prices)
+                subject.new_quotes(prices)
+                bricks = subject.get_renko().shape[0]
+
+                self.assertGreaterEqual(estimate, bricks)
+                self.assertLess(estimate, 4 * bricks + 100)
+                # The quotes after the initial brick were preallocated, so
+                # there was no reallocation
+                self.assertEqual(subject._renko.shape[0], 1 + subject.estimate_bricks(prices[1:]))
+
+    def test_max_bricks(self):
+        prices, dates, volumes = self._random_walk()
+
+        full = RenkoFixBrickSize_Fast(5, 'full')
+        full.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        ring = RenkoFixBrickSize_Fast(5, 'ring', max_bricks=50)
+        for start in range(0, prices.shape[0], 100):
+            ring.new_quotes(prices[start:start + 100], dates=dates[start:start + 100].tolist(),
+                            volumes=volumes[start:start + 100])
+
+        # Fixed memory, and the retained bricks are a view of it
+        self.assertEqual(ring._renko.shape[0], 100)
+        self.assertTrue(np.shares_memory(ring.get_renko(), ring._renko))
+        np.testing.assert_array_equal(ring.get_renko(), full.get_renko()[-50:])
+
+        trend = full.get_renko()[-50:, full.col_trend]
+        performance = ring.performance()
+        self.assertEqual(performance['renko_bricks'], 50)
+        self.assertEqual(performance['count'], full.get_renko()[-50:, full.col_count].sum())
+        self.assertEqual(performance['sign_changes'], (trend[1:] != trend[:-1]).sum())
+
+    def test_max_bricks_not_full(self):
+        subject = RenkoFixBrickSize_Fast(10, 'test', max_bricks=100)
+        subject.new_quotes(self.data.price.tolist(), volumes=self.data.volume.tolist())
+
+        self.assertListEqual(subject.get_renko()[:, subject.col_price_renko].tolist(), self.expected_renko_prices)
+        self.assertDictEqual(subject.performance(), self.expected_performance)
+
+    def test_max_bricks_with_gaps(self):
+        subject = RenkoFixBrickSize_Fast(1, 'test', max_bricks=3)
+        subject.new_quotes([100, 120, 90])
+
+        self.assertListEqual(subject.get_renko()[:, subject.col_price_renko].tolist(), [92, 91, 90])
+
+        # The memory is bounded with gaps longer than the window, on both paths
+        for compiled in (False, True):
+            subject = RenkoFixBrickSize_Fast(.01, 'test', max_bricks=10, compiled=False)
+            subject.compiled = compiled
+            brick_index = np.zeros(5, dtype=np.int64)
+            with unittest.mock.patch.object(renko_fast, '_quotes_kernel_compiled', renko_fast._quotes_kernel):
+                subject.new_quotes([100, 100.005, 149, 149.001, 100], brick_index=brick_index)
+
+            full = RenkoFixBrickSize_Fast(.01, 'full', compiled=False)
+            full_index = np.zeros(5, dtype=np.int64)
+            full.new_quotes([100, 100.005, 149, 149.001, 100], brick_index=full_index)
+
+            self.assertEqual(subject._renko.shape[0], 20)
+            self.assertGreater(subject.sequence(), 9000)
+            self.assertEqual(subject.sequence(), full.sequence())
+            self.assertListEqual(brick_index.tolist(), full_index.tolist())
+            np.testing.assert_array_equal(subject.get_renko(), full.get_renko()[-10:])
+
+    def test_max_bricks_with_long_gaps(self):
+        prices, dates, volumes = self._random_walk(size=1000)
+        prices = 100 + (prices - 100) * 20
+
+        for renko_type in (Renko.TypeRenko, Renko.TypeGrid):
+            full = RenkoFixBrickSize_Fast(.5, 'full', renko_type=renko_type, compiled=False)
+            full.new_quotes(prices, dates=dates, volumes=volumes)
+            expected = full.get_renko()
+
+            for max_bricks in (1, 5, 50):
+                for compiled in (False, True):
+                    subject = RenkoFixBrickSize_Fast(.5, 'test', renko_type=renko_type,
+                                                     max_bricks=max_bricks, compiled=False)
+                    subject.compiled = compiled
+                    with unittest.mock.patch.object(renko_fast, '_quotes_kernel_compiled',
+                                                    renko_fast._quotes_kernel):
+                        for start in range(0, prices.shape[0], 100):
+                            subject.new_quotes(prices[start:start + 100], dates=dates[start:start + 100],
+                                               volumes=volumes[start:start + 100])
+
+                        np.testing.assert_array_equal(subject.get_renko(), expected[-max_bricks:])
+                        self.assertDictEqual(subject.performance(), subject._performance_full())
+
+            # The listeners get every brick of the gaps
+            fired = []
+            subject = RenkoFixBrickSize_Fast(.5, 'test', renko_type=renko_type, max_bricks=5,
+                                             compiled=False)
+            subject.add_listener(subject.EVENT_BRICK, lambda renko, seq, brick: fired.append(seq))
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+            self.assertListEqual(fired, list(range(full.sequence() + 1)))
+            np.testing.assert_array_equal(subject.get_renko(), expected[-5:])
+            self.assertDictEqual(subject.performance(), subject._performance_full())
+
+    def test_bricks_since(self):
+        prices, dates, volumes = self._random_walk()
+
+        full = RenkoFixBrickSize_Fast(5, 'full')
+        full.new_quotes(prices, dates=dates, volumes=volumes)
+        expected = full.get_renko()
+
+        for kwargs in ({}, {'storage': RenkoFixBrickSize_Fast.STORAGE_COLUMNS}, {'max_bricks': 50}):
+            subject = RenkoFixBrickSize_Fast(5, 'test', initial_size=10, **kwargs)
+            self.assertEqual(subject.bricks_since(0).shape[0], 0)
+
+            seq = 0
+            for start in range(0, prices.shape[0], 100):
+                completed = subject.new_quotes(prices[start:start + 100], dates=dates[start:start + 100],
+                                               volumes=volumes[start:start + 100])
+
+                # The last brick seen, updated, and the new ones
+                bricks = subject.bricks_since(seq)
+                self.assertEqual(bricks.shape[0], completed + 1)
+                np.testing.assert_array_equal(bricks[:-1], expected[seq:seq + completed])
+                seq += completed
+                self.assertEqual(seq, subject.sequence())
+
+            np.testing.assert_array_equal(subject.bricks_since(seq), expected[-1:])
+            self.assertEqual(subject.bricks_since(seq + 1).shape[0], 0)
+            columns = subject.bricks_since(seq - 2, subject.AS_COLUMNS)
+            self.assertListEqual(columns['dt_end'].tolist(), (expected[-3:, full.col_dt_end] * 10**9).tolist())
+
+        self.assertTrue(np.shares_memory(subject.bricks_since(seq), subject._renko))
+        with self.assertRaises(ValueError):
+            subject.bricks_since(seq - 50)
+
+    def test_listeners(self):
+        prices, dates, volumes = self._random_walk()
+
+        full = RenkoFixBrickSize_Fast(5, 'full')
+        full.new_quotes(prices[:100])
+        full.new_quotes(prices[100:])
+        renko = full.get_renko()
+        trend = renko[:, full.col_trend]
+        expected_reversals = (np.flatnonzero(trend[1:] * trend[:-1] < 0) + 1).tolist()
+        expected_runs = np.flatnonzero((renko[:, full.col_cons_up] == 3)
+                                       | (renko[:, full.col_cons_down] == 3)).tolist()
+
+        for kwargs in ({}, {'compiled': False}, {'storage': RenkoFixBrickSize_Fast.STORAGE_COLUMNS},
+                       {'max_bricks': 10}):
+            subject = RenkoFixBrickSize_Fast(5, 'test', initial_size=10, **kwargs)
+            subject.new_quotes(prices[:100])
+            first = subject.sequence() + 1
+
+            (bricks, reversals, runs) = ([], [], [])
+            subject.add_listener(subject.EVENT_BRICK, lambda renko, seq, brick: bricks.append(seq))
+            subject.add_listener(subject.EVENT_REVERSAL,
+                                 lambda renko, seq, brick: reversals.append((seq, brick[renko.col_trend])))
+            subject.add_listener(subject.EVENT_RUN, lambda renko, seq, brick: runs.append(seq), length=3)
+            subject.new_quotes(prices[100:])
+
+            # Only the bricks added after the listeners
+            self.assertListEqual(bricks, list(range(first, renko.shape[0])))
+            self.assertListEqual(reversals, [(seq, trend[seq]) for seq in expected_reversals if seq >= first])
+            self.assertListEqual(runs, [seq for seq in expected_runs if seq >= first])
+
+        with self.assertRaises(ValueError):
+            subject.add_listener(subject.EVENT_RUN, print)
+
+    def test_sweep(self):
+        prices, _, _ = self._random_walk()
+        brick_sizes = [1, 2.5, 5, 10]
+        renko_types = [Renko.TypeRenko, Renko.TypeGrid]
+
+        table = sweep(prices, brick_sizes, renko_types, chunk_size=1000)
+        self.assertEqual(table.shape[0], 8)
+
+        for row in table:
+            subject = RenkoFixBrickSize_Fast(row['brick_size'], 'test', renko_type=row['renko_type'])
+            subject.new_quotes(prices)
+            performance = subject.performance()
+            for key in performance:
+                self.assertEqual(row[key], performance[key])
+
+        dataframe = sweep(prices, brick_sizes, ret_type=RenkoFixBrickSize_Fast.AS_DATAFRAME)
+        self.assertListEqual(dataframe.brick_size.tolist(), brick_sizes)
+        self.assertListEqual(dataframe.score.tolist(), table['score'][:4].tolist())
+
+    def _assert_incremental_performance(self, **kwargs):
+        prices, dates, volumes = self._random_walk()
+
+        subject = RenkoFixBrickSize_Fast(2, 'test', **kwargs)
+        self.assertEqual(subject.performance()['renko_bricks'], 0)
+        for start in range(0, prices.shape[0], 37):
+            subject.new_quotes(prices[start:start + 37], volumes=volumes[start:start + 37])
+            self.assertDictEqual(subject.performance(), subject._performance_full())
+
+    def test_incremental_performance(self):
+        self._assert_incremental_performance()
+        self._assert_incremental_performance(renko_type=Renko.TypeGrid)
+        self._assert_incremental_performance(initial_size=10, storage=RenkoFixBrickSize_Fast.STORAGE_COLUMNS)
+
+    def test_incremental_performance_max_bricks(self):
+        for max_bricks in (1, 2, 3, 50):
+            self._assert_incremental_performance(max_bricks=max_bricks)
+
+    def _assert_save_and_load(self, mmap, **kwargs):
+        prices, dates, volumes = self._random_walk()
+
+        whole = RenkoFixBrickSize_Fast(2, 'whole', **kwargs)
+        whole.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        subject = RenkoFixBrickSize_Fast(2, 'subject', **kwargs)
+        subject.new_quotes(prices[:3000], dates=dates[:3000].tolist(), volumes=volumes[:3000])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'renko.bin')
+            subject.save(path)
+            with open(path, 'rb') as f:
+                content = f.read()
+
+            restored = RenkoFixBrickSize_Fast.load(path, mmap=mmap)
+            np.testing.assert_array_equal(restored.get_renko(), subject.get_renko())
+            self.assertDictEqual(restored.performance(), subject.performance())
+            self.assertEqual(restored.name, 'subject')
+
+            restored.new_quotes(prices[3000:], dates=dates[3000:].tolist(), volumes=volumes[3000:])
+            np.testing.assert_array_equal(restored.get_renko(), whole.get_renko())
+            self.assertDictEqual(restored.performance(), whole.performance())
+
+            # The file is never modified
+            with open(path, 'rb') as f:
+                self.assertEqual(f.read(), content)
+            del restored
+
+    def test_save_and_load(self):
+        for mmap in (True, False):
+            self._assert_save_and_load(mmap)
+            self._assert_save_and_load(mmap, renko_type=Renko.TypeGrid, grid_price=GridPrice.MIN)
+            self._assert_save_and_load(mmap, max_bricks=20)
+            self._assert_save_and_load(mmap, initial_size=10, price_dtype=np.float32,
+                                       storage=RenkoFixBrickSize_Fast.STORAGE_COLUMNS)
+
+    def test_save_checkpoints_to_the_same_path(self):
+        prices, dates, volumes = self._random_walk()
+
+        for kwargs in ({}, {'storage': RenkoFixBrickSize_Fast.STORAGE_COLUMNS}):
+            whole = RenkoFixBrickSize_Fast(2, 'whole', **kwargs)
+            whole.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'renko.bin')
+                subject = RenkoFixBrickSize_Fast(2, 'subject', **kwargs)
+                subject.new_quotes(prices[:1000], dates=dates[:1000].tolist(), volumes=volumes[:1000])
+                subject.save(path)
+
+                # Resume from the mapped file, and save over it
+                for start in range(1000, prices.shape[0], 1000):
+                    subject = RenkoFixBrickSize_Fast.load(path)
+                    subject.save(path)
+                    subject.new_quotes(prices[start:start + 1000], dates=dates[start:start + 1000].tolist(),
+                                       volumes=volumes[start:start + 1000])
+                    subject.save(path)
+
+                restored = RenkoFixBrickSize_Fast.load(path)
+                np.testing.assert_array_equal(restored.get_renko(), whole.get_renko())
+                self.assertDictEqual(restored.performance(), whole.performance())
+                self.assertListEqual(os.listdir(directory), ['renko.bin'])
+                del subject, restored
+
+    def test_save_and_load_empty(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'renko.bin')
+            RenkoFixBrickSize_Fast(10, 'test').save(path)
+
+            restored = RenkoFixBrickSize_Fast.load(path)
+            restored.new_quotes(self.data.price.tolist())
+            self.assertListEqual(restored.get_renko()[:, restored.col_price_renko].tolist(),
+                                 self.expected_renko_prices)
+
+    def test_load_not_a_snapshot(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'renko.bin')
+            with open(path, 'wb') as f:
+                f.write(b'not a renko')
+
+            with self.assertRaises(ValueError):
+                RenkoFixBrickSize_Fast.load(path)
+
+    def test_storage_path(self):
+        prices, dates, volumes = self._random_walk()
+
+        memory = RenkoFixBrickSize_Fast(.5, 'memory')
+        memory.new_quotes(prices, dates=dates.tolist(), volumes=volumes)
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'renko.bin')
+            subject = RenkoFixBrickSize_Fast(.5, 'subject', initial_size=100, storage_path=path)
+            for start in range(0, prices.shape[0], 1000):
+                subject.new_quotes(prices[start:start + 1000], dates=dates[start:start + 1000].tolist(),
+                                   volumes=volumes[start:start + 1000])
+
+            self.assertIsInstance(subject.get_renko(), np.memmap)
+            np.testing.assert_array_equal(subject.get_renko(), memory.get_renko())
+            self.assertDictEqual(subject.performance(), memory.performance())
+            self.assertEqual((os.path.getsize(path) - 4096) % (subject._store_chunk_rows * subject._renko_cols * 8), 0)
+
+            subject.flush()
+            restored = RenkoFixBrickSize_Fast.load(path)
+            np.testing.assert_array_equal(restored.get_renko(), memory.get_renko())
+            self.assertDictEqual(restored.performance(), memory.performance())
+            del subject, restored
+
+    def test_graph(self):
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+
+        (prices, dates, volumes) = self._random_walk()
+        subject = RenkoFixBrickSize_Fast(.5, 'subject')
+        subject.new_quotes(prices, dates=dates, volumes=volumes)
+        renko = subject.get_renko()
+
+        (fig, ax) = plt.subplots()
+        self.assertIs(subject.graph(ax=ax), ax)
+        self.assertEqual(len(ax.collections), 1)
+        paths = ax.collections[0].get_paths()
+        self.assertEqual(len(paths), renko.shape[0] - 1)
+        # The rectangles of bricks up end at their renko price
+        up = np.flatnonzero(renko[1:, subject.col_trend] == 1)[0]
+        self.assertAlmostEqual(paths[up].vertices[:4, 1].max(), renko[up + 1, subject.col_price_renko])
+
+        (fig, ax) = plt.subplots()
+        subject.graph(ax=ax, start=10, stop=30)
+        self.assertEqual(len(ax.collections[0].get_paths()), 20)
+        self.assertEqual(ax.get_xlim(), (10, 31))
+
+        (fig, ax) = plt.subplots()
+        subject.graph(ax=ax, max_rectangles=100)
+        paths = ax.collections[0].get_paths()
+        self.assertLessEqual(len(paths), 100)
+        self.assertEqual(paths[0].vertices[0, 0], 1)
+        self.assertEqual(paths[-1].vertices[1, 0], renko.shape[0])
+        plt.close('all')
+
+    def test_lazy_imports(self):
+        # The engine only imports numpy, pandas, matplotlib and numba are imported when needed
+        code = ('import sys, renko, renko_fast, renko_book, renko_optimize, renko_async, renko_env; '
+                'print(sorted({m.split(".")[0] for m in sys.modules} & {"pandas", "matplotlib", "numba"}))')
+        output = subprocess.run([sys.executable, '-c', code], check=True, capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))).stdout
+        self.assertEqual(output.strip(), '[]')
+
+    def test_broken_numba_falls_back(self):
+        (prices, dates, volumes) = self._random_walk()
+        expected = RenkoFixBrickSize_Fast(5, 'expected', compiled=False)
+        expected.new_quotes(prices, dates=dates, volumes=volumes)
+
+        # numba is installed, but its import raises ImportError
+        with unittest.mock.patch.dict(sys.modules, {'numba': None}), \
+                unittest.mock.patch.object(renko_fast, '_HAS_NUMBA', True), \
+                unittest.mock.patch.object(renko_fast, '_quotes_kernel_compiled', None):
+            subject = RenkoFixBrickSize_Fast(5, 'subject')
+            self.assertTrue(subject.compiled)
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+
+            self.assertFalse(subject.compiled)
+            self.assertFalse(renko_fast._HAS_NUMBA)
+            self.assertFalse(RenkoFixBrickSize_Fast(5, 'other').compiled)
+            np.testing.assert_array_equal(subject.get_renko(), expected.get_renko())
+
+    def test_reset(self):
+        (prices, dates, volumes) = self._random_walk()
+        for kwargs in ({}, {'max_bricks': 50}, {'storage': RenkoFixBrickSize_Fast.STORAGE_COLUMNS}):
+            subject = RenkoFixBrickSize_Fast(.5, 'subject', initial_size=100, **kwargs)
+            subject.new_quotes(prices, dates=dates, volumes=volumes)
+            memory = subject._renko
+
+            subject.reset()
+            self.assertEqual(subject.sequence(), 0)
+            self.assertEqual(subject.get_renko().shape[0], 0)
+
+            subject.new_quotes(prices[:1000][::-1], dates=dates[:1000], volumes=volumes[:1000])
+            expected = RenkoFixBrickSize_Fast(.5, 'expected', **kwargs)
+            expected.new_quotes(prices[:1000][::-1], dates=dates[:1000], volumes=volumes[:1000])
+            np.testing.assert_array_equal(subject.get_renko(), expected.get_renko())
+            self.assertDictEqual(subject.performance(), expected.performance())
+            self.assertEqual(subject.sequence(), expected.sequence())
+            if 'max_bricks' in kwargs:
+                self.assertIs(subject._renko, memory)
+
+    def test_dates_to_ns_range_and_round_trip(self):
+        rnd = np.random.RandomState(0)
+        seconds = 1.5e9 + rnd.uniform(0, 1e8, 100000)
+        np.testing.assert_array_equal(renko_fast._ns_to_seconds(renko_fast.dates_to_ns(seconds)), seconds)
+
+        prices = 100 + rnd.normal(0, 1, seconds.shape[0]).cumsum()
+        subject = RenkoFixBrickSize_Fast(1, 'subject')
+        subject.new_quotes(prices, dates=seconds)
+        renko = subject.get_renko()
+        self.assertTrue(np.isin(renko[:, subject.col_dt_start], seconds).all())
+        self.assertTrue(np.isin(renko[:, subject.col_dt_end], seconds).all())
+
+        # Epoch milliseconds would overflow the nanoseconds
+        for dates in ([1600000000000], [1.6e12], [-1.6e12, 0]):
+            with self.assertRaises(ValueError):
+                renko_fast.dates_to_ns(dates)
+
+    def test_brick_index(self):
+        (prices, dates, volumes) = self._random_walk()
+        for kwargs in ({}, {'max_bricks': 20}, {'storage': RenkoFixBrickSize_Fast.STORAGE_COLUMNS},
+                       {'renko_type': Renko.TypeGrid}):
+            subject = RenkoFixBrickSize_Fast(.5, 'subject', initial_size=10, **kwargs)
+            brick_index = np.zeros(prices.shape[0], dtype=np.int32)
+            for start in range(0, prices.shape[0], 700):
+                stop = start + 700
+                subject.new_quotes(prices[start:stop], volumes=volumes[start:stop],
+                                   brick_index=brick_index[start:stop])
+
+            self.assertEqual(brick_index[0], 0)
+            self.assertEqual(brick_index[-1], subject.sequence())
+
+            # The last bricks of get_renko() with their quotes
+            renko = subject.get_renko()
+            first = subject.sequence() + 1 - renko.shape[0]
+            aggregates = aggregate_bricks(brick_index[brick_index >= first], prices[brick_index >= first],
+                                          volumes[brick_index >= first])
+            rows = aggregates['brick'] - first
+            np.testing.assert_array_equal(aggregates['count'], renko[rows, subject.col_count])
+            np.testing.assert_allclose(aggregates['volume'][1:], renko[rows[1:], subject.col_volume])
+            with_quotes = aggregates['count'] > 0
+            np.testing.assert_array_equal(aggregates['close'][with_quotes],
+                                          renko[rows[with_quotes], subject.col_price_last])
+
+        with self.assertRaises(ValueError):
+            subject.new_quotes(prices[:10], brick_index=np.zeros(9, dtype=np.int64))
+
+        # On a grid, a quote on a brick boundary restarts the count and the
+        # volume of its brick, so they are taken from aggregate_bricks()
+        prices = np.round(prices / .5) * .5
+        subject = RenkoFixBrickSize_Fast(.5, 'subject', renko_type=Renko.TypeGrid)
+        brick_index = np.zeros(prices.shape[0], dtype=np.int64)
+        subject.new_quotes(prices, volumes=volumes, brick_index=brick_index)
+
+        renko = subject.get_renko()
+        aggregates = aggregate_bricks(brick_index, prices, volumes)
+        self.assertEqual(aggregates['count'].sum(), prices.shape[0])
+        self.assertTrue((renko[:, subject.col_count] <= aggregates['count']).all())
+        self.assertTrue((renko[:, subject.col_count] < aggregates['count']).any())
+
+    def test_aggregate_bricks(self):
+        aggregates = aggregate_bricks(np.array([3, 3, 3, 5, 5]), np.array([10., 12., 11., 20., 19.]),
+                                      np.array([1., 1., 2., 0., 0.]))
+
+        np.testing.assert_array_equal(aggregates['brick'], [3, 4, 5])
+        np.testing.assert_array_equal(aggregates['count'], [3, 0, 2])
+        np.testing.assert_array_equal(aggregates['open'], [10, np.nan, 20])
+        np.testing.assert_array_equal(aggregates['high'], [12, np.nan, 20])
+        np.testing.assert_array_equal(aggregates['low'], [10, np.nan, 19])
+        np.testing.assert_array_equal(aggregates['close'], [11, np.nan, 19])
+        np.testing.assert_array_equal(aggregates['volume'], [4, 0, 0])
+        np.testing.assert_array_equal(aggregates['vwap'], [11, np.nan, np.nan])
+
+        self.assertEqual(aggregate_bricks(np.empty(0, dtype=np.int64), np.empty(0))['count'].shape, (0,))
+        with self.assertRaises(ValueError):
+            aggregate_bricks(np.array([1, 0]), np.array([1., 2.]))
+
+
+class RenkoAdaptiveBrickSize_FastTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        # The volatility grows ten times on the second half
+        changes = np.concatenate((rnd.normal(0, 1, 20000), rnd.normal(0, 10, 20000)))
+        self.prices = 1000 + changes.cumsum()
+        self.dates = np.arange(self.prices.shape[0]) + 1500000000
+        self.volumes = rnd.randint(1, 1000, self.prices.shape[0]).astype(float)
+
+    def _brick_sizes(self, subject):
+        renko = subject.get_renko()
+        return (renko[1:, subject.col_price_max] - renko[1:, subject.col_price_min]) / 3
+
+    def test_atr(self):
+        subject = RenkoAdaptiveBrickSize_Fast(5, 'subject', atr_period=200, atr_multiplier=5)
+        subject.new_quotes(self.prices)
+
+        sizes = self._brick_sizes(subject)
+        self.assertGreater(sizes[-50:].mean(), 5 * sizes[:50].mean())
+        expected_atr = np.abs(np.diff(self.prices))[-200:].mean()
+        self.assertAlmostEqual(subject._changes_sum / 200, expected_atr)
+
+    def test_constant_atr_equals_fix_brick_size(self):
+        prices = np.concatenate((100 + np.arange(60.), 159 - np.arange(1, 40.), 120 + np.arange(50.)))
+        subject = RenkoAdaptiveBrickSize_Fast(3, 'subject', atr_period=5, atr_multiplier=3)
+        subject.new_quotes(prices)
+        expected = RenkoFixBrickSize_Fast(3, 'expected')
+        expected.new_quotes(prices)
+
+        np.testing.assert_array_equal(subject.get_renko(), expected.get_renko())
+        self.assertDictEqual(subject.performance(), expected.performance())
+
+    def test_brick_pct(self):
+        prices = 1000 * np.exp(np.random.RandomState(1).normal(0, .002, 20000).cumsum())
+        subject = RenkoAdaptiveBrickSize_Fast(5, 'subject', brick_pct=.01)
+        subject.new_quotes(prices)
+
+        renko = subject.get_renko()
+        # The bricks added in the middle of a move keep the price of the quote that added them
+        middle = np.flatnonzero(renko[1:, subject.col_count] == 0) + 1
+        np.testing.assert_allclose(self._brick_sizes(subject)[middle - 1],
+                                   .01 * renko[middle, subject.col_price_last])
+
+    def test_batches_equal_single_batch(self):
+        rnd = np.random.RandomState(1)
+        for kwargs in ({'atr_period': 100, 'atr_multiplier': 4}, {'brick_pct': .005},
+                       {'atr_period': 50, 'renko_type': Renko.TypeRenkoSymetric, 'max_bricks': 100}):
+            expected = RenkoAdaptiveBrickSize_Fast(5, 'expected', **kwargs)
+            expected.new_quotes(self.prices, dates=self.dates, volumes=self.volumes)
+
+            subject = RenkoAdaptiveBrickSize_Fast(5, 'subject', **kwargs)
+            start = 0
+            while start < self.prices.shape[0]:
+                stop = start + rnd.randint(1, 300)
+                subject.new_quotes(self.prices[start:stop], dates=self.dates[start:stop],
+                                   volumes=self.volumes[start:stop])
+                start = stop
+
+            np.testing.assert_array_equal(subject.get_renko(), expected.get_renko())
+            self.assertDictEqual(subject.performance(), expected.performance())
+
+    def test_reset(self):
+        subject = RenkoAdaptiveBrickSize_Fast(5, 'subject', atr_period=200, atr_multiplier=5)
+        subject.new_quotes(self.prices)
+        subject.reset()
+        subject.new_quotes(self.prices[:5000])
+
+        expected = RenkoAdaptiveBrickSize_Fast(5, 'expected', atr_period=200, atr_multiplier=5)
+        expected.new_quotes(self.prices[:5000])
+        np.testing.assert_array_equal(subject.get_renko(), expected.get_renko())
+
+    def test_save_and_load(self):
+        for kwargs in ({'atr_period': 300, 'atr_multiplier': 5}, {'brick_pct': .01, 'min_brick_size': .5},
+                       {'atr_period': 50, 'max_bricks': 20}):
+            whole = RenkoAdaptiveBrickSize_Fast(5, 'whole', **kwargs)
+            whole.new_quotes(self.prices, dates=self.dates, volumes=self.volumes)
+
+            subject = RenkoAdaptiveBrickSize_Fast(5, 'subject', **kwargs)
+            subject.new_quotes(self.prices[:25000], dates=self.dates[:25000], volumes=self.volumes[:25000])
+
+            with tempfile.TemporaryDirectory() as directory:
+                path = os.path.join(directory, 'renko.bin')
+                subject.save(path)
+
+                restored = RenkoAdaptiveBrickSize_Fast.load(path)
+                self.assertEqual(restored.brick_size, subject.brick_size)
+                self.assertEqual(restored.min_brick_size, subject.min_brick_size)
+                np.testing.assert_array_equal(restored.get_renko(), subject.get_renko())
+
+                restored.new_quotes(self.prices[25000:], dates=self.dates[25000:], volumes=self.volumes[25000:])
+                np.testing.assert_array_equal(restored.get_renko(), whole.get_renko())
+                self.assertDictEqual(restored.performance(), whole.performance())
+
+                # The initial brick size is restored too
+                restored.reset()
+                self.assertEqual(restored.brick_size, 5)
+                del restored
+
+    def test_invalid_arguments(self):
+        with self.assertRaises(ValueError):
+            RenkoAdaptiveBrickSize_Fast(5, atr_period=10, storage_path='renko.bin')
+        with self.assertRaises(ValueError):
+            RenkoAdaptiveBrickSize_Fast(5)
+        with self.assertRaises(ValueError):
+            RenkoAdaptiveBrickSize_Fast(5, atr_period=10, brick_pct=.01)
+        with self.assertRaises(ValueError):
+            RenkoAdaptiveBrickSize_Fast(5, atr_period=10, renko_type=Renko.TypeGrid)
+
@@ -0,0 +1,71 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+
+from renko_fast import RenkoFixBrickSize_Fast
+import renko_io
+
+try:
+    import pyarrow
+except ImportError:
+    pyarrow = None
+
+
+class RenkoIOTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        size = 5000
+        self.data = pd.DataFrame({
+            'price': 100 + rnd.normal(0, 1, size).cumsum(),
+            'volume': rnd.randint(1, 100, size),
+            'date': pd.date_range('2019-01-01', periods=size, freq='s', tz='UTC'),
+        })
+
+        self.expected = RenkoFixBrickSize_Fast(2, 'expected')
+        self.expected.new_quotes(
+            self.data.price.tolist(),
+            dates=self.data.date.tolist(),
+            volumes=self.data.volume.tolist(),
+        )
+
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_feed_csv(self):
+        path = os.path.join(self.directory.name, 'quotes.csv')
+        self.data.to_csv(path, index=False)
+
+        chunks = list(renko_io.read_quotes(path, date_col='date', volume_col='volume', chunk_size=1000))
+        self.assertEqual(len(chunks), 5)
+        self.assertIsInstance(chunks[0][0], np.ndarray)
+
+        subject = renko_io.feed(RenkoFixBrickSize_Fast(2, 'test'), path, date_col='date',
+                                volume_col='volume', chunk_size=1000)
+        np.testing.assert_array_equal(subject.get_renko(), self.expected.get_renko())
+
+    def test_feed_csv_only_prices(self):
+        path = os.path.join(self.directory.name, 'quotes.txt')
+        self.data.to_csv(path, index=False, sep=';')
+
+        subject = renko_io.feed(RenkoFixBrickSize_Fast(2, 'test'), path, chunk_size=999, sep=';')
+        np.testing.assert_array_equal(
+            subject.get_renko()[:, subject.col_price_renko],
+            self.expected.get_renko()[:, subject.col_price_renko],
+        )
+
+    @unittest.skipIf(pyarrow is None, 'pyarrow is not installed')
+    def test_feed_parquet(self):
+        path = os.path.join(self.directory.name, 'quotes.parquet')
+        self.data.to_parquet(path, index=False)
+
+        subject = renko_io.feed(RenkoFixBrickSize_Fast(2, 'test'), path, date_col='date',
+                                volume_col='volume', chunk_size=1000)
+        np.testing.assert_array_equal(subject.get_renko(), self.expected.get_renko())
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            list(renko_io.read_quotes('quotes.xlsx'))
@@ -0,0 +1,59 @@
+import os
+import subprocess
+import sys
+import unittest
+import numpy as np
+
+from renko_fast import Renko
+from renko_fast import sweep
+from renko_optimize import RenkoOptimizer
+
+
+class RenkoOptimizerTest(unittest.TestCase):
+    def setUp(self):
+        rnd = np.random.RandomState(0)
+        self.instruments = {
+            'AAA': 100 + np.cumsum(rnd.normal(0, 1, 3000)),
+            'BBB': 50 + np.cumsum(rnd.normal(0, .2, 2000)),
+        }
+        self.brick_sizes = [.5, 1, 2, 4, 8]
+
+    def test_optimize_without_refinements(self):
+        optimizer = RenkoOptimizer(self.brick_sizes, processes=2, refinements=0)
+        result = optimizer.optimize(self.instruments)
+
+        self.assertListEqual(result['symbol'].tolist(), ['AAA', 'BBB'])
+        for row in result:
+            table = sweep(self.instruments[row['symbol']], self.brick_sizes)
+            best = table[np.argmax(table['score'])]
+            self.assertEqual(row['brick_size'], best['brick_size'])
+            self.assertEqual(row['score'], best['score'])
+
+    def test_optimize_coarse_to_fine(self):
+        coarse = RenkoOptimizer(self.brick_sizes, processes=2, refinements=0,
+                                renko_types=[Renko.TypeRenko, Renko.TypeRenkoSymetric])
+        fine = RenkoOptimizer(self.brick_sizes, processes=2, refinements=2,
+                              renko_types=[Renko.TypeRenko, Renko.TypeRenkoSymetric])
+
+        coarse_result = coarse.optimize(self.instruments)
+        fine_result = fine.optimize(self.instruments)
+
+        for (coarse_row, fine_row) in zip(coarse_result, fine_result):
+            self.assertGreaterEqual(fine_row['score'], coarse_row['score'])
+            self.assertIn(fine_row['renko_type'], [Renko.TypeRenko, Renko.TypeRenkoSymetric])
+
+            # The best score is the score of its brick size
+            table = sweep(self.instruments[fine_row['symbol']], [fine_row['brick_size']],
+                          [fine_row['renko_type']])
+            self.assertEqual(table[0]['score'], fine_row['score'])
+
+    def test_shared_memory_released_quietly(self):
+        # The resource tracker reports errors on the stderr of the parent
+        code = ('import numpy as np\n'
+                'from renko_optimize import RenkoOptimizer\n'
+                'prices = 100 + np.cumsum(np.random.RandomState(0).normal(0, 1, 1000))\n'
+                'RenkoOptimizer([1, 2], processes=2, refinements=0).optimize({"AAA": prices})\n')
+        result = subprocess.run([sys.executable, '-c', code], capture_output=True, text=True,
+                                cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+        self.assertEqual(result.returncode, 0, result.stderr)
+        self.assertEqual(result.stderr, '')